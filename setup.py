@@ -31,6 +31,7 @@ setup(
     python_requires='>=3.9',
     install_requires=[
         'setuptools',
+        'transaction',
         'zc.resourcelibrary >= 0.6',
         'zope.browserpage >= 3.10',
         'zope.formlib >= 4',
@@ -39,6 +40,7 @@ setup(
         'zope.formlib',
         'zope.i18n',
         'zope.interface',
+        'zope.lifecycleevent',
         'zope.schema',
     ],
     extras_require=dict(
@@ -0,0 +1,151 @@
+##############################################################################
+#
+# Copyright (c) 2026 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Column aggregates, such as totals and averages.
+
+Aggregates are declared with the `aggregates` of a column, as a sequence of
+IAggregate factories.  The formatter computes the aggregates of all of its
+visible columns in a single pass over its items, and renders them in the
+table footer.  Values that are None are ignored, as in SQL.
+"""
+from zope import interface
+
+from zc.table import interfaces
+
+
+def computeAggregates(columns, items, formatter):
+    """Compute the aggregates of columns over items, in a single pass.
+
+    Returns a dictionary mapping column names to dictionaries mapping
+    aggregate names to results.
+    """
+    accumulators = []
+    for column in columns:
+        aggregates = [
+            factory() for factory in getattr(column, 'aggregates', ())]
+        if aggregates:
+            accumulators.append(
+                (column, column.getter, [a.add for a in aggregates],
+                 aggregates))
+    if accumulators:
+        for item in items:
+            for column, getter, adders, aggregates in accumulators:
+                value = getter(item, formatter)
+                if value is not None:
+                    for add in adders:
+                        add(value)
+    return {
+        column.name: {a.name: a.result() for a in aggregates}
+        for column, getter, adders, aggregates in accumulators}
+
+
+@interface.implementer(interfaces.IAggregate)
+class Aggregate:
+    name = None
+    title = None
+
+    def add(self, value):
+        raise NotImplementedError
+
+    def result(self):
+        raise NotImplementedError
+
+
+class Count(Aggregate):
+    name = 'count'
+    title = 'Count'
+
+    def __init__(self):
+        self.count = 0
+
+    def add(self, value):
+        self.count += 1
+
+    def result(self):
+        return self.count
+
+
+class Sum(Aggregate):
+    name = 'sum'
+    title = 'Total'
+
+    def __init__(self):
+        self.total = 0
+
+    def add(self, value):
+        self.total += value
+
+    def result(self):
+        return self.total
+
+
+class Average(Aggregate):
+    name = 'average'
+    title = 'Average'
+
+    def __init__(self):
+        self.total = 0
+        self.count = 0
+
+    def add(self, value):
+        self.total += value
+        self.count += 1
+
+    def result(self):
+        if not self.count:
+            return None
+        return self.total / self.count
+
+
+class Min(Aggregate):
+    name = 'min'
+    title = 'Minimum'
+
+    def __init__(self):
+        self.value = None
+
+    def add(self, value):
+        if self.value is None or value < self.value:
+            self.value = value
+
+    def result(self):
+        return self.value
+
+
+class Max(Aggregate):
+    name = 'max'
+    title = 'Maximum'
+
+    def __init__(self):
+        self.value = None
+
+    def add(self, value):
+        if self.value is None or value > self.value:
+            self.value = value
+
+    def result(self):
+        return self.value
+
+
+class DistinctCount(Aggregate):
+    name = 'distinct'
+    title = 'Distinct'
+
+    def __init__(self):
+        self.values = set()
+
+    def add(self, value):
+        self.values.add(value)
+
+    def result(self):
+        return len(self.values)
@@ -13,20 +13,128 @@
 ##############################################################################
 """Table formatting and configuration
 """
+import collections
+import os
+
 from zope import interface
-from zope.browserpage.viewpagetemplatefile import ViewPageTemplateFile
 
 import zc.table.interfaces
 import zc.table.table
 
 
+_here = os.path.dirname(__file__)
+
+
 unspecified = object()
 
 
+def _quote(s):
+    # escape attribute values the way TAL does
+    return (str(s).replace('&', '&amp;').replace('<', '&lt;')
+            .replace('>', '&gt;').replace('"', '&quot;'))
+
+
+def _translate(msgid, request):
+    from zope.i18n import translate
+    return translate(msgid, domain='zc.table', context=request,
+                     default=msgid).replace('&', '&amp;').replace(
+                         '<', '&lt;').replace('>', '&gt;')
+
+
+BatchingState = collections.namedtuple('BatchingState', (
+    'batch_change_name', 'batch_start_name', 'batch_start',
+    'previous_batch_start', 'next_batch_start', 'has_items'))
+
+
+_pager_script = """\
+<script type="text/javascript" lang="Javascript1.1">
+
+  function zc_table_batching_do_it(el, direction) {
+    var element_name = el.attributes.batch_change_name.value;
+    var element = document.getElementById(element_name);
+    element.value = direction;
+    element.form.submit();
+  }
+
+</script>
+
+"""
+
+
+def renderPager(state, request):
+    """Render the batching controls described by a BatchingState.
+
+    This produces the same markup as batching.pt, without a page template
+    and without looking at the items again.
+    """
+    change_name = _quote(state.batch_change_name)
+    start_name = _quote(state.batch_start_name)
+    res = [
+        _pager_script,
+        '<input type="hidden" value="" id="%s" name="%s" />\n'
+        % (change_name, change_name),
+        '<input type="hidden" id="%s" name="%s" value="%s" />\n\n'
+        % (start_name, start_name, _quote(state.batch_start)),
+    ]
+    previous = state.previous_batch_start is not None
+    next = state.next_batch_start is not None
+    if not (state.has_items and (previous or next)):
+        res.append('\n')
+        return ''.join(res)
+    res.append('<div style="text-align: center; font-weight: bold"'
+               ' class="zc-table-batching-pager">\n')
+    prev_label = '&lt; <span>%s</span>' % _translate('Prev', request)
+    if previous:
+        res.append(
+            '  <a style="margin-right: 1ex" href=""'
+            ' onclick="javascript:zc_table_batching_do_it(this, \'back\');'
+            ' return false" class="zc-table-batching-pager-prev"'
+            ' batch_change_name="%s">%s</a>\n  \n'
+            % (change_name, prev_label))
+    else:
+        res.append(
+            '  \n  <span style="margin-right: 1ex"'
+            ' class="zc-table-batching-pager-prev">%s</span>\n'
+            % prev_label)
+    next_label = '<span>%s</span> &gt;' % _translate('Next', request)
+    if next:
+        res.append(
+            '  <a onclick="javascript:zc_table_batching_do_it(this, \'next\');'
+            ' return false" href="" class="zc-table-batching-pager-next"'
+            ' batch_change_name="%s">%s</a>\n  \n'
+            % (change_name, next_label))
+    else:
+        res.append(
+            '  \n  <span style="margin-right: 1ex"'
+            ' class="zc-table-batching-pager-next">%s</span>\n'
+            % next_label)
+    res.append('</div>\n')
+    return ''.join(res)
+
+
+class LazyViewPageTemplateFile:
+    """A ViewPageTemplateFile that is only created when first used.
+
+    This defers importing and parsing page templates until a template is
+    actually rendered.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.template = None
+
+    def __get__(self, instance, type=None):
+        if self.template is None:
+            from zope.browserpage.viewpagetemplatefile import \
+                ViewPageTemplateFile
+            self.template = ViewPageTemplateFile(self.filename, _prefix=_here)
+        return self.template.__get__(instance, type)
+
+
+@interface.provider(zc.table.interfaces.IFormatterFactory)
 class Formatter(zc.table.table.FormSortFormatterMixin,
                 zc.table.table.AlternatingRowFormatterMixin,
                 zc.table.table.Formatter):
-    interface.classProvides(zc.table.interfaces.IFormatterFactory)
 
     def __init__(self, context, request, items, visible_column_names=None,
                  batch_start=None, batch_size=unspecified, prefix=None,
@@ -73,59 +181,134 @@ class Formatter(zc.table.table.FormSortFormatterMixin,
     def batch_start(self):
         self._batch_start = None
 
+    def _canLookUp(self):
+        # once the time budget ran out, possibly while the items were being
+        # sorted to compute the batches, they are not looked up again
+        return self.truncation is None or self.truncation.reason != 'time'
+
     def updateBatching(self):
+        # computed into locals and set at the end, so that it can be done
+        # again if looking up the items runs out of time
         request = self.request
-        if self._batch_start is None:
+        lookup = self._canLookUp()
+        batch_start = self._batch_start
+        if batch_start is None:
             try:
-                self.batch_start = int(request.get(self.batch_start_name, '0'))
+                batch_start = int(request.get(self.batch_start_name, '0'))
             except ValueError:
-                self._batch_start = 0
+                batch_start = 0
         # Handle requests to change batches:
         change = request.get(self.batch_change_name)
         if change == "next":
-            self._batch_start += self.batch_size
-            try:
-                length = len(self.items)
-            except TypeError:
-                for length, ob in enumerate(self.items):
-                    if length > self._batch_start:
-                        break
-                else:
-                    self._batch_start = length
-            else:
-                if self._batch_start > length:
-                    self._batch_start = length
+            batch_start += self.batch_size
+            if lookup:
+                length = None
+                # counting filtered items would filter them all; unless they
+                # are sorted, only go as far as needed
+                items = self.items
+                if (isinstance(items, zc.table.table.ColumnSortedItems) and
+                        not items.sort_on):
+                    items = items.items
+                if not isinstance(items, zc.table.table.FilteredItems):
+                    try:
+                        length = len(self.items)
+                    except TypeError:
+                        pass
+                if length is None:
+                    for length, ob in enumerate(self.items):
+                        if length > batch_start:
+                            break
+                    else:
+                        batch_start = length
+                elif batch_start > length:
+                    batch_start = length
         elif change == "back":
-            self._batch_start -= self.batch_size
-            if self._batch_start < 0:
-                self._batch_start = 0
+            batch_start -= self.batch_size
+            if batch_start < 0:
+                batch_start = 0
 
-        self.next_batch_start = self._batch_start + self.batch_size
-        try:
-            self.items[self.next_batch_start]
-        except IndexError:
-            self.next_batch_start = None
+        # the next batch is unknown if the items can't be looked up
+        next_batch_start = None
+        if lookup:
+            next_batch_start = batch_start + self.batch_size
+            try:
+                self.items[next_batch_start]
+            except IndexError:
+                next_batch_start = None
 
-        self.previous_batch_start = self._batch_start - self.batch_size
-        if self.previous_batch_start < 0:
-            self.previous_batch_start = None
-        self._batch_start_computed = True
+        previous_batch_start = batch_start - self.batch_size
+        if previous_batch_start < 0:
+            previous_batch_start = None
 
-    batching_template = ViewPageTemplateFile('batching.pt')
+        self._batch_start = batch_start
+        self.next_batch_start = next_batch_start
+        self.previous_batch_start = previous_batch_start
+        self._batch_start_computed = True
 
-    def renderExtra(self):
+    @property
+    def batching_state(self):
+        """The BatchingState of the formatter, computed by updateBatching."""
         if not self._batch_start_computed:
             self.updateBatching()
-        return self.batching_template() + super().renderExtra()
+        next_batch_start = self.next_batch_start
+        if next_batch_start is not None:
+            has_items = True
+        elif self.previous_batch_start is None:
+            # no pager is rendered, whether there are items or not
+            has_items = False
+        elif not self._canLookUp():
+            has_items = True
+        else:
+            has_items = bool(self.items)
+        return BatchingState(
+            self.batch_change_name, self.batch_start_name, self._batch_start,
+            self.previous_batch_start, next_batch_start, has_items)
+
+    # Set to a page template (such as
+    # LazyViewPageTemplateFile('batching.pt')) to render the batching
+    # controls with it rather than with renderPager.
+    batching_template = None
+
+    def renderBatching(self):
+        if self.batching_template is not None:
+            if not self._batch_start_computed:
+                self.updateBatching()
+            return self.batching_template()
+        return renderPager(self.batching_state, self.request)
+
+    def renderExtra(self):
+        return self.renderBatching() + super().renderExtra()
+
+    def getValidatorData(self):
+        # The batch start is computed by looking up items, which a validator
+        # should not do: use what it is computed from instead.
+        computed = self._batch_start_computed
+        self._batch_start_computed = True  # batch_start is _batch_start
+        try:
+            res = super().getValidatorData()
+        finally:
+            self._batch_start_computed = computed
+        if res is not None:
+            res.extend((
+                self.request.get(self.batch_start_name),
+                self.request.get(self.batch_change_name)))
+        return res
 
     def __call__(self):
-        return ('\n'
-                '<div style="width: 100%"> '
-                '<!-- this div is a workaround for an IE bug -->\n'
-                '<table class="listingdescription" style="width:100%" '
-                + ('name="%s">\n' % self.prefix)
-                + self.renderContents() +
-                '</table>\n'
-                + self.renderExtra() +
-                '</div> <!-- end IE bug workaround -->\n'
-                )
+        if self.checkNotModified():
+            return ''
+        self.startBudget()
+        with self._phase('render'):
+            res = ('\n'
+                   '<div style="width: 100%"> '
+                   '<!-- this div is a workaround for an IE bug -->\n'
+                   '<table class="listingdescription" style="width:100%" '
+                   + ('name="%s">\n' % self.prefix)
+                   + self.renderContents() +
+                   '</table>\n'
+                   + self._renderExtra() +
+                   '</div> <!-- end IE bug workaround -->\n'
+                   )
+        if self.profile is not None:
+            self.profile.finish(self)
+        return res
@@ -0,0 +1,520 @@
+##############################################################################
+#
+# Copyright (c) 2026 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Benchmarks for table rendering, sorting and batching.
+
+Run ``python -m zc.table.benchmark --help`` for usage.  Results are written
+as JSON, and may be compared against the results of an earlier run.  Besides
+timings, the peak memory of renderings of increasing size can be measured.
+"""
+import argparse
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+
+# synthetic items
+
+class Record:
+    """A plain item with a few attributes of different types."""
+
+    def __init__(self, id, name, city, amount, flag):
+        self.id = id
+        self.name = name
+        self.city = city
+        self.amount = amount
+        self.flag = flag
+
+
+CITIES = ('Berlin', 'Boston', 'Fredericksburg', 'Lisbon', 'Osaka', 'Quito')
+
+
+def makeRecords(size, seed=42):
+    """Return a list of `size` records with reproducible, shuffled values."""
+    rand = random.Random(seed)
+    return [Record(str(ix),
+                   'name %08d' % rand.randrange(size * 10),
+                   rand.choice(CITIES),
+                   rand.randrange(100000) / 100,
+                   rand.random() < 0.5)
+            for ix in range(size)]
+
+
+class OneShot:
+    """An iterable that can only be iterated once, and has no length."""
+
+    def __init__(self, items):
+        self._items = items
+
+    def __iter__(self):
+        items, self._items = self._items, None
+        if items is None:
+            raise RuntimeError('OneShot iterated twice')
+        return iter(items)
+
+
+class LazyRecord:
+    """A record that, like a ZODB ghost, loads its state on first access.
+
+    Loading is counted in `loads`, a shared list of one integer, and
+    simulated by copying the state of another record.
+    """
+
+    def __init__(self, record, loads):
+        self.__dict__['_p_record'] = record
+        self.__dict__['_p_loads'] = loads
+
+    def __getattr__(self, name):
+        d = self.__dict__
+        if '_p_record' not in d:
+            raise AttributeError(name)
+        d['_p_loads'][0] += 1
+        d.update(vars(d.pop('_p_record')))
+        return d[name]
+
+
+def makeLazyRecords(size, seed=42):
+    """Return (records, loads) where loads[0] counts the records loaded."""
+    loads = [0]
+    return [LazyRecord(r, loads) for r in makeRecords(size, seed)], loads
+
+
+# environment
+
+def setUpComponents():
+    """Register the components the scenarios need in the global registry."""
+    import zope.formlib.interfaces
+    import zope.formlib.widgets
+    import zope.publisher.interfaces
+    import zope.publisher.interfaces.browser
+    import zope.schema.interfaces
+    import zope.traversing.adapters
+    import zope.traversing.interfaces
+    from zope import component
+    from zope import interface
+
+    @component.adapter(zope.publisher.interfaces.IRequest)
+    @interface.implementer(interface.Interface)
+    def resource(request):
+        return lambda: '/@@/zc.table'
+
+    request = zope.publisher.interfaces.browser.IBrowserRequest
+    choice = zope.schema.interfaces.IChoice
+    vocabulary = zope.schema.interfaces.IVocabularyTokenized
+    input = zope.formlib.interfaces.IInputWidget
+    component.provideAdapter(resource, name='zc.table')
+    component.provideAdapter(
+        zope.traversing.adapters.DefaultTraversable, (interface.Interface,),
+        zope.traversing.interfaces.ITraversable)
+    component.provideAdapter(
+        zope.formlib.widgets.TextWidget,
+        (zope.schema.interfaces.ITextLine, request), input)
+    component.provideAdapter(
+        zope.formlib.widgets.ChoiceInputWidget, (choice, request), input)
+    component.provideAdapter(
+        zope.formlib.widgets.DropdownWidget, (choice, vocabulary, request),
+        input)
+
+
+def makeRequest(form=None):
+    import zope.publisher.browser
+    return zope.publisher.browser.TestRequest(form=form or {})
+
+
+def getterColumns(subsort=False):
+    from zc.table import column
+    return (
+        column.GetterColumn(
+            'Name', lambda item, formatter: item.name, name='name',
+            subsort=subsort),
+        column.GetterColumn(
+            'City', lambda item, formatter: item.city, name='city',
+            subsort=subsort),
+        column.GetterColumn(
+            'Amount', lambda item, formatter: item.amount, name='amount',
+            subsort=subsort),
+        column.GetterColumn(
+            'Flag', lambda item, formatter: item.flag, name='flag',
+            subsort=subsort),
+    )
+
+
+# scenarios
+
+scenarios = {}
+
+
+def render(formatter, profile=None):
+    formatter.profile = profile
+    return formatter()
+
+
+def scenario(func):
+    """Register a scenario.
+
+    A scenario is called with the number of items and returns a callable
+    that performs one complete rendering; only that callable is timed.  The
+    callable takes an optional profile to set on the formatter.
+    """
+    scenarios[func.__name__.replace('_', '-')] = func
+    return func
+
+
+@scenario
+def unsorted(size):
+    from zc.table import table
+    items = makeRecords(size)
+    columns = getterColumns()
+
+    def run(profile=None):
+        render(table.Formatter(
+            None, makeRequest(), items, columns=columns), profile)
+    return run
+
+
+@scenario
+def unsorted_oneshot(size):
+    from zc.table import table
+    records = makeRecords(size)
+    columns = getterColumns()
+
+    def run(profile=None):
+        render(table.SortingFormatter(
+            None, makeRequest(), OneShot(records), columns=columns,
+            batch_size=20), profile)
+    return run
+
+
+@scenario
+def sort_single(size):
+    from zc.table import table
+    items = makeRecords(size)
+    columns = getterColumns()
+
+    def run(profile=None):
+        render(table.SortingFormatter(
+            None, makeRequest(), items, columns=columns, batch_size=20,
+            sort_on=(('name', False),)), profile)
+    return run
+
+
+@scenario
+def sort_multi_subsort(size):
+    from zc.table import table
+    items = makeRecords(size)
+    columns = getterColumns(subsort=True)
+
+    def run(profile=None):
+        render(table.SortingFormatter(
+            None, makeRequest(), items, columns=columns, batch_size=20,
+            sort_on=(('city', False), ('flag', True), ('amount', False))),
+            profile)
+    return run
+
+
+@scenario
+def sort_lazy(size):
+    from zc.table import table
+    columns = getterColumns()
+
+    def run(profile=None):
+        items, loads = makeLazyRecords(size)
+        render(table.SortingFormatter(
+            None, makeRequest(), items, columns=columns, batch_size=20,
+            sort_on=(('amount', True),)), profile)
+    return run
+
+
+def _batching(size, start):
+    from zc.table import batching
+    items = makeRecords(size)
+    columns = getterColumns()
+    form = {'zc.table.batch_start': str(start),
+            'zc.table.batch_change': 'next'}
+
+    def run(profile=None):
+        render(batching.Formatter(
+            None, makeRequest(form), items, columns=columns,
+            sort_on=(('name', False),)), profile)
+    return run
+
+
+@scenario
+def batch_shallow(size):
+    return _batching(size, 0)
+
+
+@scenario
+def batch_deep(size):
+    return _batching(size, max(size - 40, 0))
+
+
+@scenario
+def fieldcolumn_grid(size):
+    from zope import interface
+    from zope import schema
+
+    from zc.table import fieldcolumn
+    from zc.table import table
+
+    class IRecord(interface.Interface):
+        name = schema.TextLine(title='Name')
+        city = schema.Choice(title='City', values=CITIES)
+
+    class RecordColumn(fieldcolumn.FieldColumn):
+        def getId(self, item, formatter):
+            return item.id
+
+        def getFieldContext(self, item, formatter):
+            return item
+
+    items = makeRecords(size)
+    columns = (RecordColumn(IRecord['name']), RecordColumn(IRecord['city']))
+
+    def run(profile=None):
+        render(table.Formatter(
+            None, makeRequest(), items, columns=columns, prefix='grid'),
+            profile)
+    return run
+
+
+# running and comparing
+
+def measure(func, repeat=5, number=1, timer=time.perf_counter):
+    """Return the times of `repeat` runs of `number` calls, per call."""
+    times = []
+    for r in range(repeat):
+        start = timer()
+        for n in range(number):
+            func()
+        times.append((timer() - start) / number)
+    return times
+
+
+def run(names=None, size=1000, repeat=5, number=1, timer=time.perf_counter):
+    """Run the named (or all) scenarios and return the results."""
+    results = {}
+    for name in names or sorted(scenarios):
+        times = measure(scenarios[name](size), repeat, number, timer)
+        results[name] = {
+            'min': min(times),
+            'median': statistics.median(times),
+            'mean': statistics.mean(times),
+            'times': times,
+        }
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'size': size,
+        'repeat': repeat,
+        'number': number,
+        'results': results,
+    }
+
+
+def memory(names=None, sizes=(100, 1000, 10000)):
+    """Measure the memory used by renderings of increasing size.
+
+    Returns a mapping of scenario name to a list of (size, report) pairs,
+    where the report maps each rendering phase to its peak and retained
+    memory, in bytes.
+    """
+    from zc.table import profiling
+    res = {}
+    for name in names or sorted(scenarios):
+        curve = res[name] = []
+        for size in sizes:
+            func = scenarios[name](size)
+            profile = profiling.MemoryProfile()
+            func(profile)
+            curve.append((size, profile.report()['memory']))
+    return res
+
+
+def compareMemory(results, baseline, threshold=0.1, phase='render'):
+    """Compare memory curves with a baseline.
+
+    Returns a list of (name, size, baseline, current, ratio) for every
+    rendering whose peak memory in `phase` grew by more than `threshold`.
+    """
+    regressions = []
+    old = {name: dict((size, report) for size, report in curve)
+           for name, curve in baseline.get('memory', {}).items()}
+    for name, curve in sorted(results.get('memory', {}).items()):
+        for size, report in curve:
+            before = old.get(name, {}).get(size, {}).get(phase)
+            if before is None or phase not in report:
+                continue
+            before = before['peak']
+            now = report[phase]['peak']
+            ratio = now / before if before else float('inf')
+            if ratio > 1 + threshold:
+                regressions.append((name, size, before, now, ratio))
+    return regressions
+
+
+# Modules that simple uses of formatters and getter columns should not need.
+HEAVY_MODULES = (
+    'email.utils',
+    'xml.sax.saxutils',
+    'zc.resourcelibrary',
+    'zope.browserpage',
+    'zope.component',
+    'zope.formlib',
+    'zope.pagetemplate',
+    'zope.publisher',
+    'zope.security',
+)
+
+LIGHT_MODULES = ('zc.table.table', 'zc.table.column', 'zc.table.batching')
+
+
+def imports(modules=LIGHT_MODULES, repeat=5):
+    """Measure the cost of importing modules in a fresh interpreter.
+
+    Returns the smallest time taken, in seconds, and the heavy modules that
+    were imported as a side effect.
+    """
+    code = '\n'.join([
+        'import json, sys, time',
+        'start = time.perf_counter()',
+    ] + ['import ' + name for name in modules] + [
+        'stop = time.perf_counter()',
+        'print(json.dumps([stop - start, sorted(',
+        '    name for name in %r if name in sys.modules)]))' % (
+            HEAVY_MODULES,),
+    ])
+    times = []
+    for r in range(repeat):
+        output = subprocess.run(
+            [sys.executable, '-c', code], check=True, capture_output=True,
+            text=True).stdout
+        seconds, heavy = json.loads(output)
+        times.append(seconds)
+    return {'modules': list(modules), 'time': min(times), 'heavy': heavy}
+
+
+def compareImports(results, baseline, threshold=0.1):
+    """Compare import costs with a baseline.
+
+    Returns a list of problems: a description of the slowdown, if the imports
+    got slower by more than `threshold`, and of every heavy module that
+    was imported.
+    """
+    res = ['imported ' + name
+           for name in results.get('imports', {}).get('heavy', ())]
+    before = baseline.get('imports', {}).get('time')
+    now = results.get('imports', {}).get('time')
+    if before and now and now / before > 1 + threshold:
+        res.append('imports: {:.6f}s -> {:.6f}s ({:.0%})'.format(
+            before, now, now / before - 1))
+    return res
+
+
+def compare(results, baseline, threshold=0.1, statistic='min'):
+    """Compare results with a baseline.
+
+    Returns a list of (name, baseline, current, ratio) for every scenario
+    that got slower by more than `threshold` (a fraction).  Scenarios that
+    are missing in either run are ignored.
+    """
+    regressions = []
+    old = baseline.get('results', {})
+    for name, current in sorted(results.get('results', {}).items()):
+        if name not in old:
+            continue
+        before = old[name][statistic]
+        now = current[statistic]
+        ratio = now / before if before else float('inf')
+        if ratio > 1 + threshold:
+            regressions.append((name, before, now, ratio))
+    return regressions
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m zc.table.benchmark', description=__doc__)
+    parser.add_argument(
+        'scenarios', nargs='*', metavar='scenario',
+        help='scenarios to run (default: all of %s)' % ', '.join(
+            sorted(scenarios)))
+    parser.add_argument('-n', '--size', type=int, default=1000,
+                        help='number of items (default: %(default)s)')
+    parser.add_argument('-r', '--repeat', type=int, default=5,
+                        help='number of timed runs (default: %(default)s)')
+    parser.add_argument(
+        '-m', '--memory', metavar='SIZES',
+        help='measure peak memory instead of time, for a comma-separated '
+             'list of sizes')
+    parser.add_argument(
+        '-i', '--imports', action='store_true',
+        help='measure the cost of importing zc.table modules instead, and '
+             'fail if heavy dependencies are imported')
+    parser.add_argument('-o', '--output', help='write the results to a file')
+    parser.add_argument('-b', '--baseline', help='compare with these results')
+    parser.add_argument(
+        '-t', '--threshold', type=float, default=0.1,
+        help='allowed slowdown against the baseline, as a fraction '
+             '(default: %(default)s)')
+    options = parser.parse_args(args)
+    unknown = set(options.scenarios) - set(scenarios)
+    if unknown:
+        parser.error('unknown scenarios: %s' % ', '.join(sorted(unknown)))
+
+    if options.imports:
+        results = {'imports': imports(repeat=options.repeat)}
+        print('{:<24} {:>10.6f}s min {}'.format(
+            'imports', results['imports']['time'],
+            ' '.join(results['imports']['heavy'])))
+    elif options.memory:
+        setUpComponents()
+        sizes = [int(size) for size in options.memory.split(',')]
+        results = {'memory': memory(options.scenarios, sizes)}
+        for name, curve in sorted(results['memory'].items()):
+            for size, report in curve:
+                print('{:<24} {:>8} items {:>12} bytes peak'.format(
+                    name, size, report['render']['peak']))
+    else:
+        setUpComponents()
+        results = run(options.scenarios, options.size, options.repeat)
+        for name, res in sorted(results['results'].items()):
+            print('{:<24} {:>10.6f}s min {:>10.6f}s median'.format(
+                name, res['min'], res['median']))
+    if options.output:
+        with open(options.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    baseline = {}
+    if options.baseline:
+        with open(options.baseline) as f:
+            baseline = json.load(f)
+    problems = compareImports(results, baseline, options.threshold)
+    for name, before, now, ratio in compare(
+            results, baseline, options.threshold):
+        problems.append('{}: {:.6f}s -> {:.6f}s ({:.0%})'.format(
+            name, before, now, ratio - 1))
+    for name, size, before, now, ratio in compareMemory(
+            results, baseline, options.threshold):
+        problems.append('{} ({} items): {} -> {} bytes ({:.0%})'.format(
+            name, size, before, now, ratio - 1))
+    for problem in problems:
+        print('REGRESSION ' + problem)
+    return problems and 1 or 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
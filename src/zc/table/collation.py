@@ -0,0 +1,82 @@
+##############################################################################
+#
+# Copyright (c) 2026 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Collation keys, for sorting strings in the order of a language.
+
+Keys are computed with the ICU collator of the language when PyICU is
+installed.  Otherwise, a language-independent approximation is used, which
+orders strings by their letters first, ignoring accents and case, then by
+accents, then by case, lower case first.
+
+The process-wide `locale.strxfrm` is not used: it depends on the locale set
+for the whole process, and can't serve several languages at once.
+"""
+import unicodedata
+
+
+def getLanguage(request):
+    """Return the language of the locale of the request, or None."""
+    locale = getattr(request, 'locale', None)
+    if locale is None:
+        return None
+    return locale.id.language
+
+
+def fallbackKey(string):
+    decomposed = unicodedata.normalize('NFKD', string)
+    letters = ''.join(
+        c for c in decomposed if not unicodedata.combining(c)).casefold()
+    return (letters, decomposed.casefold(), string.swapcase())
+
+
+class Collator:
+    """Computes, and caches, the collation keys of strings for a language.
+
+    Keys only depend on the strings, so they remain valid as items change.
+    At most `cache_size` keys are kept.
+    """
+
+    cache_size = 100000
+
+    def __init__(self, language=None):
+        self.language = language
+        self.cache = {}
+        try:
+            import icu
+        except ImportError:
+            self.getKey = fallbackKey
+        else:
+            locale = icu.Locale(language) if language else icu.Locale.getRoot()
+            self.getKey = icu.Collator.createInstance(locale).getSortKey
+
+    def key(self, string):
+        cache = self.cache
+        try:
+            return cache[string]
+        except KeyError:
+            pass
+        if len(cache) >= self.cache_size:
+            cache.clear()
+        res = cache[string] = self.getKey(string)
+        return res
+
+
+_collators = {}
+
+
+def getCollator(language=None):
+    """Return the shared Collator of a language."""
+    collator = _collators.get(language)
+    if collator is None:
+        collator = _collators[language] = Collator(language)
+    return collator
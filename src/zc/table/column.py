@@ -11,35 +11,161 @@
 # FOR A PARTICULAR PURPOSE.
 #
 ##############################################################################
-"""Useful predefined columns."""
+"""Useful predefined columns.
+
+zope.formlib is only imported when field edit columns are used, so that
+simple tables don't pay for importing it.
+"""
 import warnings
+from base64 import b64decode
 from base64 import b64encode
-from xml.sax.saxutils import quoteattr
 
-from zope import component
-from zope import i18n
 from zope import interface
 from zope import schema
-from zope.formlib.interfaces import IInputWidget
-from zope.formlib.interfaces import WidgetInputError
-from zope.formlib.interfaces import WidgetsError
 
+from zc.table import collation
 from zc.table import interfaces
+from zc.table.table import quoteattr
+
+
+@interface.implementer(interfaces.IIdCodec)
+class Base64IdCodec:
+    """Encode ids with MIME base64, without line breaks."""
+
+    def encode(self, string):
+        return b64encode(string.encode('utf-8')).decode('ascii')
+
+    def decode(self, id):
+        return b64decode(id.encode('ascii')).decode('utf-8')
+
+
+class ItemIds:
+    """A memo of the ids computed for items, and an index of items by id.
+
+    Items need not be hashable: they are remembered by identity, and a
+    reference is kept so that identities are not reused while the memo lives.
+    """
+
+    def __init__(self, makeId):
+        self.makeId = makeId
+        self._ids = {}
+        self._index = None  # (items, id -> (position, item))
+
+    def getId(self, item):
+        try:
+            return self._ids[id(item)][1]
+        except KeyError:
+            res = self.makeId(item)
+            self._ids[id(item)] = (item, res)
+            return res
+
+    def getIndex(self, items):
+        """Return a mapping of item id to (position, item) for the items.
+
+        The mapping is kept as long as the same items sequence is passed in,
+        so that input handling and updates find items without computing
+        their ids again.  The first of items with the same id is kept.
+        """
+        if self._index is not None and self._index[0] is items:
+            return self._index[1]
+        index = {}
+        getId = self.getId
+        for pos, item in enumerate(items):
+            index.setdefault(getId(item), (pos, item))
+        self._index = (items, index)
+        return index
+
+    def getItems(self, items, ids):
+        """Return the items, in order, that have one of the ids."""
+        index = self.getIndex(items)
+        return [item for pos, item in
+                sorted(index[id] for id in ids if id in index)]
+
+
+class ItemIdsMixin:
+    """Form ids of items, computed from the `idgetter` value of the items
+    by the `id_codec`, and memoized per request.
+    """
+
+    id_codec = Base64IdCodec()
+
+    def makeId(self, item):
+        return self.id_codec.encode(self.idgetter(item))
+
+    def getIds(self, request):
+        """Return the memo of item ids for the request.
+
+        The memo lives in the request annotations, so that input handling,
+        selection and rendering share the ids computed for an item.
+        """
+        annotations = getattr(request, 'annotations', None)
+        if annotations is None:
+            return ItemIds(self.makeId)
+        memos = annotations.setdefault('zc.table.column.ids', {})
+        memo = memos.get(self)
+        if memo is None:
+            memo = memos[self] = ItemIds(self.makeId)
+        return memo
+
+
+def getSubmittedIds(form, prefix):
+    """Return the set of candidate item ids found in the names of a form.
+
+    Form names of interest look like '<prefix>.<id>' or '<prefix>.<id>.<more>'.
+    The form is scanned once, so that callers only need to build widgets for
+    items that actually have input.  As an id might contain dots itself,
+    every dotted prefix of what follows `prefix` is a candidate.
+    """
+    start = prefix and prefix + '.' or ''
+    size = len(start)
+    res = set()
+    for name in form:
+        if not name.startswith(start):
+            continue
+        name = name[size:]
+        ix = name.find('.')
+        while ix != -1:
+            res.add(name[:ix])
+            ix = name.find('.', ix + 1)
+        res.add(name)
+    return res
+
+
+def _findItems(items, ids, makeId):
+    # the (item, id) pairs of the first items having each of the ids, only
+    # looking at items until all the ids are found
+    res = []
+    remaining = set(ids)
+    for item in items:
+        if not remaining:
+            break
+        id = makeId(item)
+        if id in remaining:
+            remaining.discard(id)
+            res.append((item, id))
+    return res
 
 
 @interface.implementer(interfaces.IColumn)
 class Column:
     title = None
     name = None
+    # the names of the fields of the items that the column reads, if known,
+    # so that formatters can tell IProjectableItems
+    fields = None
 
-    def __init__(self, title=None, name=None):
+    def __init__(self, title=None, name=None, fields=None):
         if title is not None:
             self.title = title
 
         self.name = name or title
 
+        if fields is not None:
+            self.fields = fields
+
     def renderHeader(self, formatter):
-        return i18n.translate(
+        from zope.i18n import translate
+        return translate(
             self.title, context=formatter.request, default=self.title)
 
     def renderCell(self, item, formatter):
@@ -53,9 +179,16 @@ class SortingColumn(Column):
     # sort and reversesort are part of ISortableColumn, not IColumn, but are
     # put here to provide a reasonable default implementation.
 
-    def __init__(self, title=None, name=None, subsort=False):
+    # the name of the field of IQueryableItems that the sort key maps to, if
+    # any, so that such items can sort themselves
+    sort_field = None
+
+    def __init__(self, title=None, name=None, subsort=False,
+                 sort_field=None, fields=None):
         self.subsort = subsort
-        super().__init__(title, name)
+        if sort_field is not None:
+            self.sort_field = sort_field
+        super().__init__(title, name, fields)
 
     def _sort(self, items, formatter, start, stop, sorters, reverse=False):
         if self.subsort and sorters:
@@ -63,6 +196,11 @@ class SortingColumn(Column):
         else:
             items = list(items)  # don't mutate original
         getSortKey = self.getSortKey
+        profile = getattr(formatter, 'profile', None)
+        if profile is not None:
+            getSortKey = profile.wrap(self.name, 'getSortKey', getSortKey)
+        if getattr(formatter, 'deadline', None) is not None:
+            getSortKey = _checkingBudget(getSortKey, formatter)
 
         items.sort(
             key=lambda item: getSortKey(item, formatter),
@@ -83,6 +221,15 @@ class SortingColumn(Column):
         raise NotImplementedError
 
 
+def _checkingBudget(getSortKey, formatter):
+    checkBudget = formatter.checkBudget
+
+    def wrapper(item, formatter):
+        checkBudget()
+        return getSortKey(item, formatter)
+    return wrapper
+
+
 @interface.implementer_only(interfaces.IColumn)
 class GetterColumn(SortingColumn):
     """Column for simple use cases.
@@ -92,17 +239,31 @@ class GetterColumn(SortingColumn):
         returns the value used in the cell
     cell_formatter - a callable that is passed the result of getter, the
         item, and the table formatter; returns the formatted HTML
+    aggregates - a sequence of zc.table.interfaces.IAggregate factories,
+        computed from the results of getter and rendered in the table footer
+    sort_field - the name of the field that IQueryableItems sort on for the
+        column
+    fields - the names of the fields of the items read by getter,
+        cell_formatter and getSortKey, for IProjectableItems
     """
 
+    aggregates = ()
+
     def __init__(self, title=None, getter=None, cell_formatter=None,
-                 name=None, subsort=False):
+                 name=None, subsort=False, aggregates=None, sort_field=None,
+                 fields=None):
         if getter is not None:
             self.getter = getter
 
+        if aggregates is not None:
+            self.aggregates = aggregates
+
         if cell_formatter is not None:
             self.cell_formatter = cell_formatter
 
-        super().__init__(title, name, subsort=subsort)
+        super().__init__(
+            title, name, subsort=subsort, sort_field=sort_field,
+            fields=fields)
 
     def getter(self, item, formatter):
         return item
@@ -116,6 +277,15 @@ class GetterColumn(SortingColumn):
         value = self.getter(item, formatter)
         return self.cell_formatter(value, item, formatter)
 
+    def renderAggregate(self, aggregate, value, formatter):
+        from zope.i18n import translate
+        title = translate(
+            aggregate.title, context=formatter.request,
+            default=aggregate.title)
+        res = '{}: {}'.format(title, value)
+        return res.replace('&', '&#38;').replace('<', '&#60;') \
+                  .replace('>', '&#62;')
+
     # this is a convenience to override if you just want to keep the basic
     # implementation but change the comparison values.
 
@@ -123,13 +293,143 @@ class GetterColumn(SortingColumn):
         return self.getter(item, formatter)
 
 
+@interface.implementer(interfaces.IFilterableColumn)
+class FilteringGetterColumn(GetterColumn):
+    """GetterColumn whose items can be filtered.
+
+    predicate - a callable that is passed the result of getter and the
+        filter value; returns whether the item matches.  By default, the
+        result of getter, as a string, must equal the filter value.
+    index - an optional mapping from filter values to collections of the
+        matching items, such as a BTree of TreeSets; used instead of
+        the predicate
+
+    See GetterColumn for the other arguments.
+    """
+
+    index = None
+
+    def __init__(self, title=None, getter=None, cell_formatter=None,
+                 name=None, subsort=False, aggregates=None, predicate=None,
+                 index=None, sort_field=None, fields=None):
+        if predicate is not None:
+            self.predicate = predicate
+
+        if index is not None:
+            self.index = index
+
+        super().__init__(
+            title, getter, cell_formatter, name, subsort, aggregates,
+            sort_field, fields)
+
+    def predicate(self, value, filter_value):
+        return str(value) == filter_value
+
+    def filter(self, items, value, formatter):
+        getter = self.getter
+        predicate = self.predicate
+        return (item for item in items
+                if predicate(getter(item, formatter), value))
+
+    def getIndexed(self, value, formatter):
+        if self.index is None:
+            return None
+        return self.index.get(value, ())
+
+
+class CollatedGetterColumn(GetterColumn):
+    """GetterColumn sorting its values in the order of the request language.
+
+    The values are converted to strings, and sorted by their collation keys
+    (see zc.table.collation), which are computed once per string and
+    language.  None sorts first.
+    """
+
+    def getSortKey(self, item, formatter):
+        value = self.getter(item, formatter)
+        if value is None:
+            return (False,)
+        collator = collation.getCollator(
+            collation.getLanguage(formatter.request))
+        return (True, collator.key(str(value)))
+
+
+class MemoizedGetterColumn(GetterColumn):
+    """GetterColumn reusing the HTML it rendered for equal values.
+
+    For columns with few distinct values, such as statuses or flags.  The
+    cell formatter must only depend on the value (and the request).
+
+    memo - 'render' to reuse the HTML within a rendering, or 'language' to
+        share it between the renderings in a language
+    memo_size - the number of values remembered; others are rendered
+    memo_checks - the number of reuses, per rendering, for which the cell
+        formatter is called anyway and its result compared; if it differs,
+        the column stops reusing HTML
+
+    Unhashable values are always rendered.
+    """
+
+    def __init__(self, title=None, getter=None, cell_formatter=None,
+                 name=None, subsort=False, aggregates=None, sort_field=None,
+                 fields=None, memo='render', memo_size=1000, memo_checks=1):
+        super().__init__(
+            title, getter, cell_formatter, name, subsort, aggregates,
+            sort_field, fields)
+        assert memo in ('render', 'language', None)
+        self.memo = memo
+        self.memo_size = memo_size
+        self.memo_checks = memo_checks
+        self._memos = {}  # language -> {(type, value): HTML}
+
+    def _getMemo(self, formatter):
+        # the memo and the number of checks left of the rendering
+        key = ('zc.table.memo', self.name)
+        res = formatter.annotations.get(key)
+        if res is None:
+            if self.memo == 'language':
+                language = collation.getLanguage(formatter.request)
+                memo = self._memos.get(language)
+                if memo is None:
+                    memo = self._memos.setdefault(language, {})
+            else:
+                memo = {}
+            res = formatter.annotations[key] = [memo, self.memo_checks]
+        return res
+
+    def renderCell(self, item, formatter):
+        value = self.getter(item, formatter)
+        if self.memo is None:
+            return self.cell_formatter(value, item, formatter)
+        state = self._getMemo(formatter)
+        memo = state[0]
+        key = (value.__class__, value)
+        try:
+            res = memo.get(key)
+        except TypeError:  # unhashable
+            return self.cell_formatter(value, item, formatter)
+        if res is None:
+            res = self.cell_formatter(value, item, formatter)
+            if len(memo) < self.memo_size:
+                memo[key] = res
+        elif state[1] > 0:
+            state[1] -= 1
+            rendered = self.cell_formatter(value, item, formatter)
+            if rendered != res:
+                # the HTML depends on more than the value
+                self.memo = None
+                self._memos.clear()
+                return rendered
+        return res
+
+
 class MailtoColumn(GetterColumn):
     def renderCell(self, item, formatter):
         email = super().renderCell(item, formatter)
         return f'<a href="mailto:{email}">{email}</a>'
 
 
-class FieldEditColumn(Column):
+class FieldEditColumn(ItemIdsMixin, Column):
     """Columns that supports field/widget update
 
     Note that fields are only bound if bind == True.
@@ -137,7 +437,7 @@ class FieldEditColumn(Column):
 
     def __init__(self, title=None, prefix=None, field=None,
                  idgetter=None, getter=None, setter=None, name='', bind=False,
-                 widget_class=None, widget_extra=None):
+                 widget_class=None, widget_extra=None, bulksetter=None):
         super().__init__(title, name)
         assert prefix is not None  # this is required
         assert field is not None  # this is required
@@ -151,14 +451,16 @@ class FieldEditColumn(Column):
         if setter is None:
             setter = field.set
         self.set = setter
+        self.bulksetter = bulksetter
         self.bind = bind
         self.widget_class = widget_class
         self.widget_extra = widget_extra
 
-    def makeId(self, item):
-        return b64encode(self.idgetter(item).encode('utf-8')).decode('ascii')
-
     def input(self, items, request):
+        from zope import component
+        from zope.formlib.interfaces import IInputWidget
+        from zope.formlib.interfaces import WidgetInputError
+        from zope.formlib.interfaces import WidgetsError
         if not hasattr(request, 'form'):
             warnings.warn(
                 'input should be called with a request, not a formatter',
@@ -166,15 +468,20 @@ class FieldEditColumn(Column):
             request = request.request
         data = {}
         errors = []
+        submitted = getSubmittedIds(request.form, self.prefix)
+        if not submitted:
+            return data
+        ids = self.getIds(request)
+        getId = ids.getId
         bind = self.bind
         if not bind:
             widget = component.getMultiAdapter(
                 (self.field, request), IInputWidget)
-        for item in items:
+        for item in ids.getItems(items, submitted):
+            id = getId(item)
             if bind:
                 widget = component.getMultiAdapter(
                     (self.field.bind(item), request), IInputWidget)
-            id = self.makeId(item)
             # this is wrong: should use formatter prefix.  column should not
             # have a prefix.  This requires a rewrite; this entire class
             # will be deprecated.
@@ -189,21 +496,41 @@ class FieldEditColumn(Column):
             raise WidgetsError(errors)
         return data
 
-    def update(self, items, data):
-        changed = False
-        for item in items:
-            id = self.makeId(item)
-            v = data.get(id, self)
-            if v is self:
-                continue
-            if self.get(item) != v:
-                self.set(item, v)
-                changed = True
-        return changed
+    def update(self, items, data, request=None):
+        return bool(self.updateItems(items, data, request))
+
+    def updateItems(self, items, data, request=None):
+        """Update items from input data, and return the items that changed.
+
+        Only items with data are looked at.  If a request is passed, they are
+        found with the index of the ids computed for its input; otherwise,
+        iteration stops as soon as all of them have been found.  Changed
+        values are set with the bulk setter, if one was given, in a single
+        call with a list of (item, value) pairs.
+        """
+        if not data:
+            return []
+        if request is None:
+            found = _findItems(items, data, self.makeId)
+        else:
+            ids = self.getIds(request)
+            found = [(item, ids.getId(item))
+                     for item in ids.getItems(items, data)]
+        changes = [(item, data[id]) for item, id in found
+                   if self.get(item) != data[id]]
+        if changes:
+            if self.bulksetter is not None:
+                self.bulksetter(changes)
+            else:
+                for item, v in changes:
+                    self.set(item, v)
+        return [item for item, v in changes]
 
     def renderCell(self, item, formatter):
-        id = self.makeId(item)
+        from zope import component
+        from zope.formlib.interfaces import IInputWidget
         request = formatter.request
+        id = self.getIds(request).getId(item)
         field = self.field
         if self.bind:
             field = field.bind(item)
@@ -252,10 +579,15 @@ class SelectionColumn(FieldEditColumn):
     def getSelected(self, items, request):
         """Return the items which were selected."""
         data = self.input(items, request)
-        return [item for item in items if data.get(self.makeId(item))]
+        if not data:
+            return []
+        if not hasattr(request, 'form'):
+            request = request.request
+        return self.getIds(request).getItems(
+            items, [id for id, value in data.items() if value])
 
 
-class SubmitColumn(Column):
+class SubmitColumn(ItemIdsMixin, Column):
 
     def __init__(self, title=None, prefix=None, idgetter=None, action=None,
                  labelgetter=None, condition=None,
@@ -275,36 +607,40 @@ class SubmitColumn(Column):
         self.cssClass = cssClass
         self.labelgetter = labelgetter
 
-    def makeId(self, item):
-        return ''.join(self.idgetter(item).encode('base64').split())
-
     def input(self, items, request):
-        for item in items:
-            id = self.makeId(item)
-            identifier = f'{self.prefix}.{id}'
-            if identifier in request.form:
-                if self.condition is None or self.condition(item):
-                    return id
-                break
-
-    def update(self, items, data):
+        form = request.form
+        submitted = [id for id in getSubmittedIds(form, self.prefix)
+                     if f'{self.prefix}.{id}' in form]
+        if not submitted:
+            return None
+        ids = self.getIds(request)
+        for item in ids.getItems(items, submitted):
+            if self.condition is None or self.condition(item):
+                return ids.getId(item)
+            break
+
+    def update(self, items, data, request=None):
         if data:
-            for item in items:
-                id = self.makeId(item)
-                if id == data:
-                    self.action(item)
-                    return True
+            if request is None:
+                found = [item for item, id in
+                         _findItems(items, [data], self.makeId)]
+            else:
+                found = self.getIds(request).getItems(items, [data])
+            if found:
+                self.action(found[0])
+                return True
         return False
 
     def renderCell(self, item, formatter):
         if self.condition is None or self.condition(item):
-            id = self.makeId(item)
+            id = self.getIds(formatter.request).getId(item)
             identifier = f'{self.prefix}.{id}'
             if self.renderer is not None:
                 return self.renderer(
                     item, identifier, formatter, self.extra, self.cssClass)
             label = self.labelgetter(item, formatter)
-            label = i18n.translate(
+            from zope.i18n import translate
+            label = translate(
                 label, context=formatter.request, default=label)
             val = "<input type='submit' name={} value={} {}".format(
                 quoteattr(identifier),
@@ -11,36 +11,190 @@
 # FOR A PARTICULAR PURPOSE.
 #
 ##############################################################################
+import functools
 import re
 from xml.sax.saxutils import quoteattr
 
 import zope.formlib.form
 import zope.formlib.interfaces
+import zope.formlib.itemswidgets
+import zope.formlib.widget
 import zope.schema.interfaces
 from zope import component
+from zope import interface
+from zope.component import ComponentLookupError
 from zope.formlib.interfaces import IDisplayWidget
 from zope.formlib.interfaces import IInputWidget
 from zope.formlib.interfaces import WidgetInputError
 from zope.formlib.interfaces import WidgetsError
+from zope.interface import providedBy
 
+import zc.table.interfaces
 from zc.table import column
 
 
 isSafe = re.compile(r'[\w +/]*$').match
 
 
+@interface.implementer(zc.table.interfaces.IIdCodec)
+class SafeIdCodec:
+    """Leave safe strings alone, and base64-encode others.
+
+    We don't want to use base64 unless we have to, because it makes testing
+    and reading html more difficult.  Encoded strings are marked with a
+    leading '=', which our `isSafe` regex does not allow, so that the
+    encoding can be reversed.  As a consequence, encoding is not idempotent.
+    """
+
+    _base64 = column.Base64IdCodec()
+
+    def encode(self, string):
+        if isSafe(string):
+            return string
+        return '=' + self._base64.encode(string)
+
+    def decode(self, id):
+        if id.startswith('='):
+            return self._base64.decode(id[1:])
+        return id
+
+
+_safe = SafeIdCodec()
+
+
 def toSafe(string):
-    # We don't want to use base64 unless we have to,
-    # because it makes testing and reading html more difficult.  We make this
-    # safe because all base64 strings will have a trailing '=', and our
-    # `isSafe` regex does not allow '=' at all.  The only downside to the
-    # approach is that a 'safe' string generated by the `toSafe` base64 code
-    # will not pass the `isSafe` test, so the function is not idempotent.  The
-    # simpler version (without the `isSafe` check) was not idempotent either,
-    # so no great loss.
-    if not isSafe(string):
-        string = ''.join(string.encode('base64').split())
-    return string
+    return _safe.encode(string)
+
+
+def fromSafe(id):
+    return _safe.decode(id)
+
+
+# Choice widgets are registered as functions that do a second lookup on
+# (field, vocabulary, request); we resolve that second lookup ourselves so
+# that it can be cached too.
+_choiceWidgetFactories = (
+    zope.formlib.itemswidgets.ChoiceInputWidget,
+    zope.formlib.itemswidgets.ChoiceDisplayWidget,
+)
+
+
+def _lookupWidgetFactory(objects, iface, cache):
+    key = (iface,) + tuple(providedBy(ob) for ob in objects)
+    try:
+        return cache[key]
+    except KeyError:
+        pass
+    factory = component.getSiteManager().adapters.lookup(
+        key[1:], iface, '')
+    if factory in _choiceWidgetFactories:
+        vocabulary = objects[0].vocabulary
+        inner = _lookupWidgetFactory(
+            (objects[0], vocabulary, objects[1]), iface, cache)
+        if inner is not None:
+            def factory(field, request):
+                return inner(field, field.vocabulary, request)
+    cache[key] = factory
+    return factory
+
+
+_ItemsEditWidgetBase = zope.formlib.itemswidgets.ItemsEditWidgetBase
+
+
+def _canCacheOptions(widget):
+    # Only the stock <option> rendering is known to depend on nothing but
+    # the term and the selection state (radio buttons use index and name,
+    # for instance).
+    klass = widget.__class__
+    return (isinstance(widget, _ItemsEditWidgetBase) and
+            klass.renderItemsWithValues is
+            _ItemsEditWidgetBase.renderItemsWithValues and
+            klass.renderItem is _ItemsEditWidgetBase.renderItem and
+            klass.renderSelectedItem is
+            _ItemsEditWidgetBase.renderSelectedItem)
+
+
+class RenderedOptions:
+    """The rendered <option> elements of one vocabulary for one rendering.
+
+    The options are rendered once with nothing selected; the selected
+    variant of an option is rendered the first time a row needs it.
+    """
+
+    def __init__(self, widget, values):
+        self.vocabulary = widget.vocabulary
+        missing = widget._toFormValue(widget.context.missing_value)
+        # Rendering with only the missing value gives us the same set of
+        # options (with or without a "no value" entry) the widget would
+        # render for these values.
+        self.items = _ItemsEditWidgetBase.renderItemsWithValues(
+            widget, missing in values and [missing] or [])
+        self.terms = list(self.vocabulary)
+        self.offset = len(self.items) - len(self.terms)
+        self.indexes = {}
+        for ix, term in enumerate(self.terms):
+            try:
+                self.indexes.setdefault(term.value, ix)
+            except TypeError:  # unhashable values: see getIndex
+                pass
+        self.selected = {}
+
+    def getIndex(self, value):
+        try:
+            return self.indexes.get(value)
+        except TypeError:
+            for ix, term in enumerate(self.terms):
+                if term.value == value:
+                    return ix
+
+    def render(self, widget, values):
+        res = list(self.items)
+        for value in values:
+            ix = self.getIndex(value)
+            if ix is None:
+                continue
+            selected = self.selected.get(ix)
+            if selected is None:
+                term = self.terms[ix]
+                selected = self.selected[ix] = widget.renderSelectedItem(
+                    ix + self.offset, widget.textForValue(term), term.token,
+                    widget.name, widget.cssClass)
+            res[ix + self.offset] = selected
+        return res
+
+
+# Display widgets whose rendering only depends on the value and on what is
+# shared by the widgets of a field can render values without a widget per
+# cell.  These reproduce their __call__ for a rendered value.
+
+def _renderDisplay(widget, value):
+    # zope.formlib.widget.DisplayWidget
+    if value == widget.context.missing_value:
+        return ""
+    return zope.formlib.widget.escape(value)
+
+
+def _renderUnicodeDisplay(widget, value):
+    # zope.formlib.widget.UnicodeDisplayWidget
+    if value == widget.context.missing_value:
+        return ""
+    return zope.formlib.widget.escape(zope.formlib.widget.toStr(value))
+
+
+def _renderItemDisplay(widget, value):
+    # zope.formlib.itemswidgets.ItemDisplayWidget
+    value = widget._toFormValue(value)
+    if value is None or value == '':
+        return widget.translate(widget._messageNoValue)
+    return widget.textForValue(widget.vocabulary.getTerm(value))
+
+
+_unset = object()
+
+
+def getChanges(formatter):
+    """Return the (item, column) pairs changed by column updates so far."""
+    return formatter.annotations.get('zc.table.fieldcolumn.changes', [])
 
 
 class BaseColumn(column.Column):
@@ -48,7 +202,7 @@ class BaseColumn(column.Column):
     # subclass helper API (not expected to be overridden)
 
     def getPrefix(self, item, formatter):
-        prefix = self.getId(item, formatter)
+        prefix = self.getCachedId(item, formatter)
         if formatter.prefix:
             prefix = f'{formatter.prefix}.{prefix}'
         return prefix
@@ -66,10 +220,51 @@ class BaseColumn(column.Column):
     def getAnnotation(self, name, formatter, default=None):
         return formatter.annotations.get(self.key + name, default)
 
+    def getIds(self, formatter):
+        """Return the memo of item ids for the formatter."""
+        ids = self.getAnnotation('ids', formatter)
+        if ids is None:
+            ids = column.ItemIds(lambda item: self.getId(item, formatter))
+            self.setAnnotation('ids', ids, formatter)
+        return ids
+
+    def getCachedId(self, item, formatter):
+        """Return getId(item, formatter), computed once per formatter."""
+        return self.getIds(formatter).getId(item)
+
+    def getItemIndex(self, items, formatter):
+        """Return a mapping of item id to (position, item) for the items.
+
+        The mapping is kept for the formatter as long as the same items
+        sequence is passed in.
+        """
+        cached = self.getAnnotation('index', formatter)
+        if cached is not None and cached[0] is items:
+            return cached[1]
+        index = {}
+        getId = self.getIds(formatter).getId
+        for pos, item in enumerate(items):
+            index.setdefault(getId(item), (pos, item))
+        self.setAnnotation('index', (items, index), formatter)
+        return index
+
+    def getSubmittedItems(self, items, formatter):
+        """Return the items, in order, that have names in the request form.
+        """
+        submitted = column.getSubmittedIds(
+            formatter.request.form, formatter.prefix)
+        if not submitted:
+            return []
+        index = self.getItemIndex(items, formatter)
+        found = sorted(index[id] for id in submitted if id in index)
+        return [item for pos, item in found]
+
     # subclass customization API
 
+    id_codec = _safe
+
     def getId(self, item, formatter):
-        return toSafe(str(item))
+        return self.id_codec.encode(str(item))
 
 
 class FieldColumn(BaseColumn):
@@ -106,18 +301,107 @@ class FieldColumn(BaseColumn):
                 iface = IDisplayWidget
             else:
                 iface = IInputWidget
-            widget = component.getMultiAdapter((field, request), iface)
+            widget = self.getWidgetFactory(field, iface, formatter)(
+                field, request)
+            if widget is None:
+                raise ComponentLookupError((field, request), iface, '')
         else:
             widget = form_field.custom_widget(field, request)
         if form_field.prefix:  # this should not be necessary AFAICT
             prefix = f'{prefix}.{form_field.prefix}'
         widget.setPrefix(prefix)
+        if _canCacheOptions(widget):
+            self.cacheOptions(widget, formatter)
         return widget
 
+    def getWidgetFactory(self, field, iface, formatter):
+        """Return the widget factory for the field and formatter request.
+
+        Lookups are cached for the rendering, keyed by what the field and
+        request provide, so bound fields share the lookup of their unbound
+        field.
+        """
+        cache = self.getAnnotation('widget_factories', formatter)
+        if cache is None:
+            cache = {}
+            self.setAnnotation('widget_factories', cache, formatter)
+        request = formatter.request
+        factory = _lookupWidgetFactory((field, request), iface, cache)
+        if factory is None:
+            raise ComponentLookupError((field, request), iface, '')
+        return factory
+
+    def cacheOptions(self, widget, formatter):
+        """Make the widget reuse <option> elements rendered for other rows.
+
+        Only vocabularies of the unbound field are shared; vocabularies that
+        are computed for a bound field are rendered by the widget as usual.
+        """
+        vocabulary = widget.vocabulary
+        if vocabulary is not getattr(self.field.field, 'vocabulary', None):
+            return
+        cache = self.getAnnotation('options', formatter)
+        if cache is None:
+            cache = {}
+            self.setAnnotation('options', cache, formatter)
+
+        def renderItemsWithValues(values):
+            missing = widget._toFormValue(widget.context.missing_value)
+            key = (widget.cssClass, missing in values)
+            options = cache.get(key)
+            if options is None or options.vocabulary is not vocabulary:
+                options = cache[key] = RenderedOptions(widget, values)
+            return options.render(widget, values)
+        widget.renderItemsWithValues = renderItemsWithValues
+
+    def getDisplayRenderer(self, item, formatter):
+        """Return a callable rendering values as the display widget does.
+
+        Returns None if the column renders input widgets, or if its display
+        widget can't be shared by the cells.  The renderer is made once per
+        rendering, with a single widget, using the item for the field
+        context.
+        """
+        renderer = self.getAnnotation('display_renderer', formatter, _unset)
+        if renderer is _unset:
+            renderer = self.makeDisplayRenderer(item, formatter)
+            self.setAnnotation('display_renderer', renderer, formatter)
+        return renderer
+
+    def makeDisplayRenderer(self, item, formatter):
+        klass = self.__class__
+        if (klass.getInputWidget is not FieldColumn.getInputWidget or
+                klass.getRenderWidget is not FieldColumn.getRenderWidget):
+            return None  # customized widgets
+        form_field = self.field
+        field = form_field.field
+        if form_field.custom_widget is not None or not (
+                field.readonly or form_field.for_display):
+            return None
+        context = self.getFieldContext(item, formatter)
+        if context is not None:
+            field = field.bind(context)
+        widget = self.getWidgetFactory(field, IDisplayWidget, formatter)(
+            field, formatter.request)
+        call = widget.__class__.__call__
+        if call is zope.formlib.widget.DisplayWidget.__call__:
+            return functools.partial(_renderDisplay, widget)
+        if call is zope.formlib.widget.UnicodeDisplayWidget.__call__:
+            return functools.partial(_renderUnicodeDisplay, widget)
+        if (call is zope.formlib.itemswidgets.ItemDisplayWidget.__call__ and
+                widget.vocabulary is getattr(
+                    form_field.field, 'vocabulary', None)):
+            # the vocabulary doesn't depend on the field context
+            return functools.partial(_renderItemDisplay, widget)
+        return None
+
     def getRenderWidget(self, item, formatter, ignore_request=False):
         widget = self.getInputWidget(item, formatter)
+        # display widgets don't necessarily provide IDisplayWidget, or have
+        # input
         if (ignore_request or
                 IDisplayWidget.providedBy(widget) or
+                self.field.for_display or self.field.field.readonly or
                 not widget.hasInput()):
             widget.setRenderedValue(self.get(item, formatter))
         return widget
@@ -130,6 +414,14 @@ class FieldColumn(BaseColumn):
     def set(self, item, value, formatter):
         self.field.field.set(item, value)
 
+    def setMany(self, changes, formatter):
+        """Set the values of a sequence of (item, value) pairs.
+
+        Override to store many values at once.
+        """
+        for item, value in changes:
+            self.set(item, value, formatter)
+
     def getFieldContext(self, item, formatter):
         return None
 
@@ -138,11 +430,12 @@ class FieldColumn(BaseColumn):
     def input(self, items, formatter):
         data = {}
         errors = []
-        for item in items:
+        for item in self.getSubmittedItems(items, formatter):
             widget = self.getInputWidget(item, formatter)
             if widget.hasInput():
                 try:
-                    data[self.getId(item, formatter)] = widget.getInputValue()
+                    data[self.getCachedId(item, formatter)] = (
+                        widget.getInputValue())
                 except WidgetInputError as v:
                     errors.append(v)
         if errors:
@@ -150,18 +443,35 @@ class FieldColumn(BaseColumn):
         return data
 
     def update(self, items, data, formatter):
-        changed = False
-        for item in items:
-            id = self.getId(item, formatter)
-            v = data.get(id, self)
-            if v is not self and self.get(item, formatter) != v:
-                self.set(item, v, formatter)
-                changed = True
-        if changed:
-            self.setAnnotation('changed', changed, formatter)
-        return changed
+        return bool(self.updateItems(items, data, formatter))
+
+    def updateItems(self, items, data, formatter):
+        """Update items from input data, and return the items that changed.
+
+        Only the items named in data are looked at, and changed values are
+        set with a single call to setMany.  The changes are also recorded
+        for getChanges.
+        """
+        if not data:
+            return []
+        index = self.getItemIndex(items, formatter)
+        found = sorted(index[id] + (v,) for id, v in data.items()
+                       if id in index)
+        changes = [(item, v) for pos, item, v in found
+                   if self.get(item, formatter) != v]
+        if not changes:
+            return []
+        self.setMany(changes, formatter)
+        self.setAnnotation('changed', True, formatter)
+        formatter.annotations.setdefault(
+            'zc.table.fieldcolumn.changes', []).extend(
+                (item, self) for item, v in changes)
+        return [item for item, v in changes]
 
     def renderCell(self, item, formatter):
+        renderer = self.getDisplayRenderer(item, formatter)
+        if renderer is not None:
+            return renderer(self.get(item, formatter))
         ignore_request = self.getAnnotation('changed', formatter)
         return self.getRenderWidget(
             item, formatter, ignore_request)()
@@ -192,8 +502,9 @@ class SubmitColumn(BaseColumn):
     # basic API
 
     def input(self, items, formatter):
-        for item in items:
-            if self.getIdentifier(item, formatter) in formatter.request.form:
+        form = formatter.request.form
+        for item in self.getSubmittedItems(items, formatter):
+            if self.getIdentifier(item, formatter) in form:
                 return item
 
     def update(self, items, item, formatter):
@@ -53,6 +53,28 @@ class IColumn(interface.Interface):
         """
 
 
+class IAggregate(interface.Interface):
+    """An aggregate of the values of a column, such as their sum.
+
+    Aggregates are computed incrementally: a new aggregate is created for
+    each computation, and is passed the values one at a time.
+    """
+
+    name = interface.Attribute(
+        "The name of the aggregate, such as 'sum'.  The factory of the "
+        "aggregate must provide it too.")
+
+    title = interface.Attribute(
+        "The title of the aggregate, used when rendering it.  The factory of "
+        "the aggregate must provide it too.")
+
+    def add(value):
+        """Add a value that isn't None to the aggregate."""
+
+    def result():
+        """Return the aggregate of the values added so far."""
+
+
 class ISortableColumn(interface.Interface):
 
     def sort(items, formatter, start, stop, sorters):
@@ -80,6 +102,121 @@ class ISortableColumn(interface.Interface):
         The original items sequence should not be mutated."""
 
 
+class IFilterableColumn(interface.Interface):
+
+    def filter(items, value, formatter):
+        """Return an iterable of the items that match value, in order.
+
+        Should be lazy: the items may be an iterator, and the result is
+        iterated at most once.  Formatter is passed to aid calculation of
+        the values to match."""
+
+    def getIndexed(value, formatter):
+        """Return a collection of the items that match value, or None.
+
+        Columns with an index of the items, such as a BTree mapping values
+        to sets of items, return the matching items from it, supporting
+        iteration, len and membership tests; the indexed items must be
+        the items of the formatter.  Other columns return None, and their
+        filter is used instead."""
+
+
+class IQueryableItems(interface.Interface):
+    """Items that can sort, slice and count themselves.
+
+    Items such as the rows of a database query provide this, so that only
+    the items that are rendered are loaded.  Sorting formatters delegate to
+    query when all the columns sorted on have a `sort_field`, naming the
+    field of the items that their sort keys map to.
+    """
+
+    def query(sort_on, start, stop):
+        """Return a sequence of the items from start to stop, in order.
+
+        Sort_on is a sequence of (field name, reversed boolean) pairs,
+        beginning with the primary sort field.  Start and stop are not
+        negative, and stop may be None.  Items with equal sort fields are in
+        the order of the items when they are not sorted."""
+
+    def __getitem__(key):
+        """given index or slice, returns requested item(s), unsorted."""
+
+    def __iter__():
+        """iterates over the items, unsorted"""
+
+    def __len__():
+        """returns the number of items"""
+
+
+class IProjectableItems(interface.Interface):
+    """Items that can load only some of their fields.
+
+    Formatters tell such items which fields their columns read, as declared
+    by the `fields` of the columns, a sequence of field names.
+    """
+
+    def setProjection(fields):
+        """Only load the fields with the given names, or all if None."""
+
+
+class IPermutationStore(interface.Interface):
+    """Stores the sorted orders of items, as permutations of their indexes.
+
+    A permutation is a sequence of integers: the index, in the unsorted
+    items, of each sorted item.  Permutations are stored for a version of
+    the items, which must change when the items do, and a sort_on, a
+    sequence of (column name, reversed) pairs.
+    """
+
+    def get(version, sort_on):
+        """Return the stored permutation, or None."""
+
+    def set(version, sort_on, permutation):
+        """Store a permutation, replacing any other for the sort_on.
+
+        Returns the stored permutation, which may be a different sequence
+        with the same values.
+        """
+
+
+class IItemCache(interface.Interface):
+    """Data derived from items, updated as the items change.
+
+    zc.table subscribes to the object events of zope.lifecycleevent, and
+    updates the caches that are subscription adapters of the changed object
+    to this interface.
+    """
+
+    def added(item):
+        """Update the cache for an added item."""
+
+    def modified(item):
+        """Update the cache for a modified item, if it is cached."""
+
+    def removed(item):
+        """Update the cache for a removed item, if it is cached."""
+
+
+class ISortCache(IItemCache):
+    """The items of a table, in the orders they have been sorted in.
+
+    Changes of the items are applied when the transaction making them is
+    committed.
+    """
+
+    def get(sort_on, language=None, version=None):
+        """Return the items sorted on sort_on, or None if not cached.
+
+        sort_on is a sequence of (column name, reversed) pairs, and language
+        the language of the request.  If version, the version of the items,
+        is not None and differs from the version of the cached orders, they
+        are dropped.
+        """
+
+    def set(sort_on, items, language=None, version=None):
+        """Sort items on sort_on and cache them; return the sorted items."""
+
+
 class IColumnSortedItems(interface.Interface):
     """items that support sorting by column.  setFormatter must be called
     with the formatter to be used before methods work.  This is typically done
@@ -258,6 +395,36 @@ class IFormatter(interface.Interface):
         Should be based on batch_start and batch_size, if set.
         """
 
+    def renderFooter():
+        """Render the HTML table footer, with the aggregates of the columns.
+
+        Returns an empty string if no visible column declares aggregates, or
+        if the budget ruled them out.  Uses getAggregates."""
+
+    def getAggregates():
+        """Compute the aggregates declared by the visible columns.
+
+        The aggregates are computed in a single pass over the full set of
+        self.items, and only once per formatter.  Returns a dictionary
+        mapping column names to dictionaries mapping aggregate names to
+        results, or None if the items exceed the row budget or the time
+        budget, or if the rendering was truncated.
+
+        Available for more low-level use of a table, such as exports."""
+
+
+class IIdCodec(interface.Interface):
+    """Converts item keys to form-friendly ids and back."""
+
+    def encode(string):
+        """Return a form-friendly id for the string.
+
+        The id must not contain dots, which separate the parts of form names.
+        """
+
+    def decode(id):
+        """Return the string for which `encode` returned the id."""
+
 
 class IFormatterFactory(interface.Interface):
     """When called returns a table formatter.
@@ -0,0 +1,286 @@
+##############################################################################
+#
+# Copyright (c) 2026 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Keeping caches of items up to date as the items change.
+
+The subscribers of this module, registered in configure.zcml, pass the
+objects of added, modified and removed events to the IItemCache subscription
+adapters of the objects.  Register the caches of the items of a table, such
+as a SortCache or a zc.table.search.SearchIndex, as subscription adapters of
+the interface of the items, for instance with
+
+    zope.component.provideSubscriptionAdapter(
+        lambda item: cache, (IPerson,), zc.table.interfaces.IItemCache)
+"""
+import bisect
+import collections
+import threading
+
+import transaction
+from zope import component
+from zope import interface
+from zope.lifecycleevent.interfaces import IObjectAddedEvent
+from zope.lifecycleevent.interfaces import IObjectModifiedEvent
+from zope.lifecycleevent.interfaces import IObjectRemovedEvent
+
+from zc.table import interfaces
+
+
+def getCaches(item):
+    return component.subscribers((item,), interfaces.IItemCache)
+
+
+@component.adapter(IObjectAddedEvent)
+def itemAdded(event):
+    for cache in getCaches(event.object):
+        cache.added(event.object)
+
+
+@component.adapter(IObjectModifiedEvent)
+def itemModified(event):
+    for cache in getCaches(event.object):
+        cache.modified(event.object)
+
+
+@component.adapter(IObjectRemovedEvent)
+def itemRemoved(event):
+    for cache in getCaches(event.object):
+        cache.removed(event.object)
+
+
+class _Reversed:
+    """A sort key that sorts in reverse order."""
+
+    __slots__ = ('key',)
+
+    def __init__(self, key):
+        self.key = key
+
+    def __lt__(self, other):
+        return other.key < self.key
+
+    def __eq__(self, other):
+        return self.key == other.key
+
+
+class _Order:
+
+    def __init__(self, getKey):
+        self.getKey = getKey
+        self.keys = []
+        self.items = []
+        self.ids = {}  # id -> key
+
+
+class _Locale:
+    # as much of a locale as collation.getLanguage reads
+
+    def __init__(self, language):
+        self.id = self
+        self.language = language
+
+
+class _Request:
+
+    def __init__(self, language):
+        self.locale = _Locale(language) if language is not None else None
+
+
+class SortContext:
+    """The formatter-like context sort keys are computed with by a SortCache.
+
+    Its `request` only has the `locale` of a language, for the columns that
+    sort in the order of the language, such as CollatedGetterColumn.
+    """
+
+    def __init__(self, language):
+        self.language = language
+        self.request = _Request(language)
+        self.annotations = {}
+
+
+class _Changes:
+
+    def __init__(self):
+        self.changes = []  # (method name, item)
+        self.version = None
+
+
+@interface.implementer(interfaces.ISortCache)
+class SortCache:
+    """The items of a table, kept sorted as they change.
+
+    columns - the sortable columns of the table; their sort keys are
+        computed with a SortContext as the formatter, so they must not
+        depend on the formatter or on the request, but for its language.
+    getId - a callable that is passed an item; returns a hashable id that is
+        unique among the items.
+    size - the number of orders kept.
+    getVersion - an optional callable returning the version of the items,
+        such as the `items_version` of the formatters of the table.
+
+    Set it as the `sort_cache` of the formatters of the table that show all
+    its items, in place of the items they sort.  Formatters don't use it for
+    items they filter, nor for columns that don't sort by their sort keys.
+    Orders are kept per language and sort_on.  Changed items are moved to
+    their new position in each order with a binary search, rather than
+    sorting the items again, once the transaction changing them is
+    committed.  Items with equal sort keys are in the order they were added
+    in.
+
+    The cache is tagged with the `items_version` of the formatters that set
+    its orders.  When a formatter has another version, as when the items
+    were changed by another process, the orders are dropped.  With
+    getVersion, the cache is tagged with the version of the items read
+    before the transaction changing them commits, so that it remains valid
+    after its own changes are applied.
+    """
+
+    version = None
+
+    def __init__(self, columns, getId=id, size=10, getVersion=None):
+        self.columns = columns
+        self.columns_by_name = {col.name: col for col in columns}
+        self.getId = getId
+        self.size = size
+        self.getVersion = getVersion
+        # (language, sort_on) -> _Order
+        self._orders = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def getKeyFunction(self, sort_on, language=None):
+        getters = []
+        for nm, reversed in sort_on:
+            column = self.columns_by_name[nm]
+            getters.append((column.getSortKey, reversed))
+            if not getattr(column, 'subsort', False):
+                break  # the column ignores the other sort columns
+        context = SortContext(language)
+
+        def getKey(item):
+            return tuple(
+                _Reversed(getSortKey(item, context)) if reversed
+                else getSortKey(item, context)
+                for getSortKey, reversed in getters)
+        return getKey
+
+    def _checkVersion(self, version):
+        # drop the orders of other versions of the items
+        if version is not None and version != self.version:
+            self._orders.clear()
+            self.version = version
+
+    def get(self, sort_on, language=None, version=None):
+        key = (language, _normalize(sort_on))
+        with self._lock:
+            self._checkVersion(version)
+            order = self._orders.get(key)
+            if order is None:
+                return None
+            self._orders.move_to_end(key)
+            return order.items
+
+    def set(self, sort_on, items, language=None, version=None):
+        sort_on = _normalize(sort_on)
+        order = _Order(self.getKeyFunction(sort_on, language))
+        pairs = sorted(((order.getKey(item), item) for item in items),
+                       key=lambda pair: pair[0])
+        order.keys = [key for key, item in pairs]
+        order.items = [item for key, item in pairs]
+        getId = self.getId
+        order.ids = {getId(item): key for key, item in pairs}
+        key = (language, sort_on)
+        with self._lock:
+            self._checkVersion(version)
+            self._orders[key] = order
+            self._orders.move_to_end(key)
+            while len(self._orders) > self.size:
+                self._orders.popitem(last=False)
+        return order.items
+
+    def _insert(self, order, id, item):
+        key = order.getKey(item)
+        ix = bisect.bisect_right(order.keys, key)
+        order.keys.insert(ix, key)
+        order.items.insert(ix, item)
+        order.ids[id] = key
+
+    def _remove(self, order, id):
+        key = order.ids.pop(id)
+        ix = bisect.bisect_left(order.keys, key)
+        getId = self.getId
+        while getId(order.items[ix]) != id:
+            ix += 1
+        del order.keys[ix]
+        del order.items[ix]
+
+    def added(self, item):
+        self._change('_added', item)
+
+    def modified(self, item):
+        self._change('_modified', item)
+
+    def removed(self, item):
+        self._change('_removed', item)
+
+    def _change(self, name, item):
+        # changes are applied once the transaction is committed
+        txn = transaction.get()
+        try:
+            changes = txn.data(self)
+        except KeyError:
+            changes = _Changes()
+            txn.set_data(self, changes)
+            if self.getVersion is not None:
+                txn.addBeforeCommitHook(self._beforeCommit, (changes,))
+            txn.addAfterCommitHook(self._afterCommit, (changes,))
+        changes.changes.append((name, item))
+
+    def _beforeCommit(self, changes):
+        changes.version = self.getVersion()
+
+    def _afterCommit(self, committed, changes):
+        if not committed:
+            return
+        with self._lock:
+            for order in self._orders.values():
+                # formatters may be reading the previous list
+                order.items = list(order.items)
+            for name, item in changes.changes:
+                getattr(self, name)(item)
+            if changes.version is not None:
+                self.version = changes.version
+
+    def _added(self, item):
+        id = self.getId(item)
+        for order in self._orders.values():
+            if id in order.ids:
+                self._remove(order, id)
+            self._insert(order, id, item)
+
+    def _modified(self, item):
+        id = self.getId(item)
+        for order in self._orders.values():
+            if id in order.ids:
+                self._remove(order, id)
+                self._insert(order, id, item)
+
+    def _removed(self, item):
+        id = self.getId(item)
+        for order in self._orders.values():
+            if id in order.ids:
+                self._remove(order, id)
+
+
+def _normalize(sort_on):
+    return tuple((nm, bool(reversed)) for nm, reversed in sort_on)
@@ -0,0 +1,236 @@
+##############################################################################
+#
+# Copyright (c) 2026 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Sorted orders shared between processes.
+
+Set the `permutations` of a sorting formatter to a MappedPermutationStore,
+and its `items_version` to the version of its items, to sort the items once
+for all the processes of a host.  The order is stored in a file as an array
+of item indexes, which processes map read-only: pages are sliced from the
+mapping without reading the rest of it.
+
+A PrewarmingStore keeps the most requested orders of a table sorted in
+background threads, so that they are ready when the items change.
+"""
+import array
+import collections
+import concurrent.futures
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+import threading
+
+from zope import interface
+
+from zc.table import interfaces
+
+
+# magic, digest of the version, array typecode
+_header = struct.Struct('<8s20sc3x')
+_magic = b'zc.table'
+
+
+def _digest(value):
+    return hashlib.sha1(repr(value).encode('utf-8')).digest()
+
+
+def _normalize(sort_on):
+    return tuple((nm, bool(reversed)) for nm, reversed in sort_on)
+
+
+class MappedPermutation:
+    """A read-only permutation in a memory-mapped file."""
+
+    def __init__(self, file):
+        self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.digest, typecode = _header.unpack_from(self._mmap)
+        if magic != _magic:
+            raise ValueError('not a permutation file')
+        self._array = memoryview(self._mmap)[_header.size:].cast(
+            typecode.decode('ascii'))
+
+    def __len__(self):
+        return len(self._array)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return self._array[key].tolist()
+        return self._array[key]
+
+    def __iter__(self):
+        return iter(self._array)
+
+
+@interface.implementer(interfaces.IPermutationStore)
+class MappedPermutationStore:
+    """Permutations in memory-mapped files of a directory.
+
+    There is one file per sort_on, holding the permutation of the latest
+    version stored.  Files are replaced atomically, so processes that have
+    mapped the previous version keep a consistent view of it.  At most `size`
+    files are kept: storing another order removes the least recently stored.
+    """
+
+    def __init__(self, directory, size=100):
+        self.directory = directory
+        self.size = size
+        self._mapped = {}  # path: ((inode, mtime), MappedPermutation)
+
+    def getPath(self, sort_on):
+        name = hashlib.sha1(
+            repr(_normalize(sort_on)).encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, name + '.perm')
+
+    def _map(self, path):
+        try:
+            with open(path, 'rb') as file:
+                stat = os.fstat(file.fileno())
+                signature = (stat.st_ino, stat.st_mtime_ns)
+                mapped = self._mapped.get(path)
+                if mapped is None or mapped[0] != signature:
+                    mapped = self._mapped[path] = (
+                        signature, MappedPermutation(file))
+        except FileNotFoundError:
+            self._mapped.pop(path, None)
+            return None
+        return mapped[1]
+
+    def get(self, version, sort_on):
+        res = self._map(self.getPath(sort_on))
+        if res is None or res.digest != _digest(version):
+            return None
+        return res
+
+    def set(self, version, sort_on, permutation):
+        data = array.array('I')
+        if len(permutation) > 2 ** (8 * data.itemsize) - 1:
+            data = array.array('Q')
+        data.extend(permutation)
+        path = self.getPath(sort_on)
+        if not os.path.exists(path):
+            self._evict(self.size - 1)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                file.write(_header.pack(
+                    _magic, _digest(version), data.typecode.encode('ascii')))
+                data.tofile(file)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        return self.get(version, sort_on)
+
+    def _evict(self, size):
+        # remove the least recently stored files beyond size
+        paths = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.perm'):
+                try:
+                    paths.append((entry.stat().st_mtime_ns, entry.path))
+                except FileNotFoundError:
+                    pass  # removed by another process
+        paths.sort()
+        for mtime, path in paths[:max(len(paths) - size, 0)]:
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            self._mapped.pop(path, None)
+
+
+@interface.implementer(interfaces.IPermutationStore)
+class PrewarmingStore:
+    """A store that recomputes the most requested orders of a table.
+
+    store - the IPermutationStore holding the permutations
+    factory - a callable that is passed a version and a sort_on, and returns
+        a sorting formatter of the items of that version, sorted on sort_on
+    size - the number of the most requested orders kept warm
+    workers - the number of threads sorting them
+    tracked - the number of orders whose requests are counted; when more
+        are requested, the counts of the least requested are dropped
+
+    Set it as the `permutations` of the formatters of the table to count how
+    often each order is requested, and call `changed` with the version of the
+    items when they change.
+    """
+
+    version = None
+
+    def __init__(self, store, factory, size=10, workers=1, tracked=1000):
+        self.store = store
+        self.factory = factory
+        self.size = size
+        self.workers = workers
+        self.tracked = tracked
+        self.requests = collections.Counter()
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def get(self, version, sort_on):
+        sort_on = _normalize(sort_on)
+        with self._lock:
+            requests = self.requests
+            if sort_on not in requests and len(requests) >= self.tracked:
+                self.requests = requests = collections.Counter(
+                    dict(requests.most_common(self.tracked // 2)))
+            requests[sort_on] += 1
+        return self.store.get(version, sort_on)
+
+    def set(self, version, sort_on, permutation):
+        return self.store.set(version, sort_on, permutation)
+
+    def getPopular(self):
+        """Return the most requested sort_on values, most requested first."""
+        with self._lock:
+            return [sort_on for sort_on, count
+                    in self.requests.most_common(self.size)]
+
+    def changed(self, version):
+        """Sort the items of a new version in the most requested orders.
+
+        Returns a future per order, with a true result if it was sorted.
+        """
+        self.version = version
+        with self._lock:
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    self.workers, thread_name_prefix='zc.table.prewarm')
+            executor = self._executor
+        return [executor.submit(self.prewarm, version, sort_on)
+                for sort_on in self.getPopular()]
+
+    def prewarm(self, version, sort_on):
+        """Sort the items of a version on sort_on, unless already done.
+
+        Versions older than the last one passed to changed are skipped.
+        """
+        if version != self.version:
+            return False
+        if self.store.get(version, sort_on) is not None:
+            return False
+        formatter = self.factory(version, sort_on)
+        formatter.permutations = self.store
+        formatter.items_version = version
+        formatter.items[0:0]
+        return True
+
+    def close(self):
+        """Wait for the orders being sorted and stop the threads."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
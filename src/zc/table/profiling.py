@@ -0,0 +1,179 @@
+##############################################################################
+#
+# Copyright (c) 2026 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Instrumentation of table rendering.
+
+Set the `profile` attribute of a formatter to a Profile to record how much
+time is spent, and how many calls are made, in each column and in each phase
+of the rendering.  A MemoryProfile also records the memory allocated in each
+phase.
+"""
+import contextlib
+import time
+import tracemalloc
+
+
+class Profile:
+    """Per-column timings and call counts of a formatter rendering.
+
+    callback - an optional callable that is passed the report when the
+        formatter has finished rendering.
+    clock - a callable returning the current time in seconds.
+    """
+
+    def __init__(self, callback=None, clock=time.perf_counter):
+        self.callback = callback
+        self.clock = clock
+        self.columns = {}
+        self.phases = {}
+        self.sort_time = 0.0
+        self.sorts = 0
+        self.sorted_items = 0
+        self.rendered_items = 0
+
+    def record(self, column_name, operation, seconds, calls=1):
+        ops = self.columns.setdefault(column_name, {})
+        stats = ops.get(operation)
+        if stats is None:
+            ops[operation] = [calls, seconds]
+        else:
+            stats[0] += calls
+            stats[1] += seconds
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Record the time spent in a phase of the rendering.
+
+        The formatter uses the phases 'render' (everything), 'items'
+        (fetching the items to render, including 'sort'), 'rows' (rendering
+        the rows) and 'extra' (rendering what follows the table).
+        """
+        clock = self.clock
+        start = clock()
+        try:
+            yield
+        finally:
+            stats = self.phases.get(name)
+            if stats is None:
+                self.phases[name] = [1, clock() - start]
+            else:
+                stats[0] += 1
+                stats[1] += clock() - start
+
+    def call(self, column_name, operation, func, *args):
+        """Call func with args, recording the time spent."""
+        clock = self.clock
+        start = clock()
+        try:
+            return func(*args)
+        finally:
+            self.record(column_name, operation, clock() - start)
+
+    def wrap(self, column_name, operation, func):
+        """Return a version of func that records the time spent."""
+        def wrapper(*args):
+            return self.call(column_name, operation, func, *args)
+        return wrapper
+
+    def recordSort(self, seconds, items):
+        """Record a complete (possibly multi-column) sort."""
+        self.sorts += 1
+        self.sort_time += seconds
+        self.sorted_items += items
+
+    def countItems(self, items):
+        """Iterate over items, counting them as rendered."""
+        for item in items:
+            self.rendered_items += 1
+            yield item
+
+    def report(self):
+        """Return the recorded data as a dictionary of plain values."""
+        return {
+            'columns': {
+                name: {op: {'calls': calls, 'time': seconds}
+                       for op, (calls, seconds) in ops.items()}
+                for name, ops in self.columns.items()},
+            'phases': {
+                name: {'calls': calls, 'time': seconds}
+                for name, (calls, seconds) in self.phases.items()},
+            'sort': {
+                'calls': self.sorts,
+                'time': self.sort_time,
+                'items': self.sorted_items},
+            'rendered_items': self.rendered_items,
+        }
+
+    def finish(self, formatter):
+        """Called by the formatter when a rendering is complete."""
+        if self.callback is not None:
+            self.callback(self.report())
+
+
+class MemoryProfile(Profile):
+    """A profile that also records the memory allocated in each phase.
+
+    Memory is traced with tracemalloc, which is started when the first phase
+    is entered (if it isn't tracing already) and stopped when the rendering
+    is finished.  For each phase, `peak` is the largest amount of memory, in
+    bytes, allocated above what was allocated when the phase was entered, and
+    `retained` is the amount still allocated when the phase was left.
+    """
+
+    def __init__(self, callback=None, clock=time.perf_counter):
+        super().__init__(callback, clock)
+        self.memory = {}
+        self._stack = []
+        self._started = False
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started = True
+        stack = self._stack
+        current, peak = tracemalloc.get_traced_memory()
+        if stack:
+            # the enclosing phase must not lose the peak it has seen so far
+            stack[-1][1] = max(stack[-1][1], peak)
+        tracemalloc.reset_peak()
+        entry = [current, current]
+        stack.append(entry)
+        try:
+            with super().phase(name):
+                yield
+        finally:
+            current, peak = tracemalloc.get_traced_memory()
+            stack.pop()
+            peak = max(entry[1], peak)
+            if stack:
+                stack[-1][1] = max(stack[-1][1], peak)
+            stats = self.memory.get(name)
+            if stats is None:
+                stats = self.memory[name] = {
+                    'calls': 0, 'peak': 0, 'retained': 0}
+            stats['calls'] += 1
+            stats['peak'] = max(stats['peak'], peak - entry[0])
+            stats['retained'] += current - entry[0]
+
+    def report(self):
+        res = super().report()
+        res['memory'] = {
+            name: dict(stats) for name, stats in self.memory.items()}
+        return res
+
+    def finish(self, formatter):
+        if self._started and not self._stack:
+            tracemalloc.stop()
+            self._started = False
+        super().finish(formatter)
@@ -0,0 +1,248 @@
+##############################################################################
+#
+# Copyright (c) 2026 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Text search over the values of columns.
+
+A SearchIndex is an inverted index from the words in the getter values of
+columns to item ids.  It is meant to be kept by the application between
+requests, rebuilt when the version of the data changes and updated as items
+change.  A SearchColumn makes it available as a filter of a formatter using
+zc.table.table.FilteringFormatterMixin.
+"""
+import bisect
+import re
+
+from zope import interface
+
+from zc.table import column
+from zc.table import interfaces
+
+
+_words = re.compile(r'\w+').findall
+
+
+def tokenize(value):
+    """Return the lower case words of a value."""
+    return _words(str(value).lower())
+
+
+@interface.implementer(interfaces.IItemCache)
+class SearchIndex:
+    """An incremental inverted index of words to item ids.
+
+    columns - the columns whose getter values are indexed; the getters are
+        passed None as the formatter.
+    getId - a callable that is passed an item; returns a hashable id that is
+        unique among the items.
+    tokenize - a callable that is passed a value; returns its words.
+
+    As an item cache, it applies the changes of the items when the
+    transaction making them is committed.
+    """
+
+    version = None
+
+    def __init__(self, columns, getId, tokenize=tokenize):
+        self.columns = columns
+        self.getId = getId
+        self.tokenize = tokenize
+        self.clear()
+
+    def clear(self):
+        self._postings = {}  # word -> set of ids
+        self._words = []  # sorted words, for prefix searches
+        self._items = {}  # id -> (item, sequence number, words)
+        self._sequence = 0
+        self.version = None
+
+    def build(self, items, version=None):
+        """Index items, unless they were already indexed for version.
+
+        Returns whether the index was rebuilt.
+        """
+        if version is not None and version == self.version:
+            return False
+        self.clear()
+        # the words are sorted once, rather than inserted one at a time
+        for item in items:
+            id = self.getId(item)
+            self._unindex(id)
+            self._index(id, item)
+        self._words = sorted(self._postings)
+        self.version = version
+        return True
+
+    def getWords(self, item):
+        words = set()
+        for col in self.columns:
+            value = col.getter(item, None)
+            if value is not None:
+                words.update(self.tokenize(value))
+        return words
+
+    def add(self, item):
+        """Index an item, replacing what was indexed under its id."""
+        id = self.getId(item)
+        self.remove(id)
+        for word in self._index(id, item):
+            bisect.insort(self._words, word)
+
+    update = add
+
+    def remove(self, id):
+        """Remove the item with the id from the index, if it is indexed."""
+        for word in self._unindex(id):
+            del self._words[bisect.bisect_left(self._words, word)]
+
+    def _index(self, id, item):
+        # returns the words that were not indexed yet
+        words = frozenset(self.getWords(item))
+        self._items[id] = (item, self._sequence, words)
+        self._sequence += 1
+        new = []
+        for word in words:
+            ids = self._postings.get(word)
+            if ids is None:
+                ids = self._postings[word] = set()
+                new.append(word)
+            ids.add(id)
+        return new
+
+    def _unindex(self, id):
+        # returns the words that are no longer indexed
+        entry = self._items.pop(id, None)
+        if entry is None:
+            return []
+        gone = []
+        for word in entry[2]:
+            ids = self._postings[word]
+            ids.discard(id)
+            if not ids:
+                del self._postings[word]
+                gone.append(word)
+        return gone
+
+    # IItemCache
+
+    def added(self, item):
+        self._change('add', item)
+
+    def modified(self, item):
+        self._change('_modified', item)
+
+    def removed(self, item):
+        self._change('_removed', item)
+
+    def _change(self, name, item):
+        # changes are applied once the transaction is committed, as by
+        # zc.table.invalidation.SortCache
+        import transaction
+        txn = transaction.get()
+        try:
+            changes = txn.data(self)
+        except KeyError:
+            changes = []
+            txn.set_data(self, changes)
+            txn.addAfterCommitHook(self._afterCommit, (changes,))
+        changes.append((name, item))
+
+    def _afterCommit(self, committed, changes):
+        if committed:
+            for name, item in changes:
+                getattr(self, name)(item)
+
+    def _modified(self, item):
+        if self.getId(item) in self._items:
+            self.add(item)
+
+    def _removed(self, item):
+        self.remove(self.getId(item))
+
+    def __len__(self):
+        return len(self._items)
+
+    def _prefixed(self, prefix):
+        words = self._words
+        ix = bisect.bisect_left(words, prefix)
+        res = set()
+        while ix < len(words) and words[ix].startswith(prefix):
+            res.update(self._postings[words[ix]])
+            ix += 1
+        return res
+
+    def search(self, text):
+        """Return the ids of the items that have words starting with each
+        of the words of text.
+        """
+        prefixes = self.tokenize(text)
+        if not prefixes:
+            return set(self._items)
+        matches = sorted((self._prefixed(p) for p in set(prefixes)), key=len)
+        res = matches[0]
+        for ids in matches[1:]:
+            if not res:
+                break
+            res = res.intersection(ids)
+        return res
+
+    def searchItems(self, text):
+        """Return the items matching text, in the order they were indexed."""
+        return SearchResults(self, self.search(text))
+
+
+class SearchResults:
+    """Items found by a search, in the order they were indexed.
+
+    Supports iteration, len and membership tests by item.
+    """
+
+    def __init__(self, index, ids):
+        self.index = index
+        self.ids = ids
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, item):
+        return self.index.getId(item) in self.ids
+
+    def __iter__(self):
+        entries = self.index._items
+        found = sorted((entries[id] for id in self.ids), key=lambda e: e[1])
+        return iter([entry[0] for entry in found])
+
+
+@interface.implementer(interfaces.IFilterableColumn)
+class SearchColumn(column.Column):
+    """A column filtering the items of a formatter with a SearchIndex.
+
+    It is meant to be one of the columns of a formatter, but not one of its
+    visible columns; the filter value is the searched text.  It only
+    reads the ids of the items, which projected items are expected to keep,
+    so it declares no fields and doesn't turn off projection.
+    """
+
+    def __init__(self, index, title=None, name='search', fields=()):
+        self.index = index
+        super().__init__(title, name, fields)
+
+    def renderCell(self, item, formatter):
+        return ''
+
+    def filter(self, items, value, formatter):
+        ids = self.index.search(value)
+        getId = self.index.getId
+        return (item for item in items if getId(item) in ids)
+
+    def getIndexed(self, value, formatter):
+        return self.index.searchItems(value)
@@ -0,0 +1,329 @@
+##############################################################################
+#
+# Copyright (c) 2026 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Selections of items across batches and sort orders.
+
+A Selection is a compact set of integer item ids, which may stand for all the
+matching items but some.  A SelectionColumn renders a checkbox per item and
+carries the selection from request to request in a hidden form field, so that
+users can select items in several batches, or select all the matching items
+without them being looked up, before acting on the selection.
+"""
+import array
+import base64
+import bisect
+import struct
+import sys
+import zlib
+
+from zope import i18n
+
+from zc.table import column
+from zc.table.table import quoteattr
+
+
+class IdSet:
+    """A set of integer ids, kept in a sorted array.
+
+    Its string form, a bitmap when the ids are dense and the array otherwise,
+    compressed, is meant to be carried by forms.  It has at most max_ids ids,
+    so that its string form can be read back; adding more raises ValueError.
+    """
+
+    max_ids = 2 ** 16  # the most ids of a set, and read by fromString
+
+    def __init__(self, ids=()):
+        ids = sorted(set(ids))
+        self._checkSize(len(ids))
+        self._ids = array.array('q', ids)
+
+    def _checkSize(self, size):
+        if size > self.max_ids:
+            raise ValueError('too many ids')
+
+    def __contains__(self, id):
+        ids = self._ids
+        ix = bisect.bisect_left(ids, id)
+        return ix < len(ids) and ids[ix] == id
+
+    def __iter__(self):
+        return iter(self._ids)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __bool__(self):
+        return bool(self._ids)
+
+    def add(self, id):
+        ids = self._ids
+        ix = bisect.bisect_left(ids, id)
+        if ix == len(ids) or ids[ix] != id:
+            self._checkSize(len(ids) + 1)
+            ids.insert(ix, id)
+
+    def discard(self, id):
+        ids = self._ids
+        ix = bisect.bisect_left(ids, id)
+        if ix < len(ids) and ids[ix] == id:
+            del ids[ix]
+
+    def update(self, ids):
+        ids = sorted(set(self._ids).union(ids))
+        self._checkSize(len(ids))
+        self._ids = array.array('q', ids)
+
+    def clear(self):
+        self._ids = array.array('q')
+
+    def toString(self):
+        ids = self._ids
+        if ids and (ids[-1] - ids[0]) // 8 + 1 < len(ids) * ids.itemsize:
+            start = ids[0]
+            bitmap = bytearray((ids[-1] - start) // 8 + 1)
+            for id in ids:
+                id -= start
+                bitmap[id >> 3] |= 1 << (id & 7)
+            data = b'b' + struct.pack('<q', start) + bytes(bitmap)
+        else:
+            if sys.byteorder == 'big':
+                ids = array.array('q', ids)
+                ids.byteswap()
+            data = b'a' + ids.tobytes()
+        return base64.urlsafe_b64encode(zlib.compress(data)).decode('ascii')
+
+    @classmethod
+    def fromString(cls, string):
+        """Return the IdSet of a string returned by toString.
+
+        Raises ValueError if the string is not one, or if it has more than
+        max_ids ids.
+        """
+        # the string form of max_ids ids has at most 8 bytes per id, after
+        # the kind and the start of a bitmap, which bounds its span too
+        max_size = 9 + 8 * cls.max_ids
+        try:
+            decompressor = zlib.decompressobj()
+            data = decompressor.decompress(
+                base64.urlsafe_b64decode(string.encode('ascii')), max_size)
+        except (UnicodeError, ValueError, zlib.error):
+            raise ValueError('invalid id set')
+        if decompressor.unconsumed_tail or not decompressor.eof:
+            raise ValueError('invalid id set')
+        res = cls()
+        kind, data = data[:1], data[1:]
+        if kind == b'b' and len(data) >= 8:
+            if _countBits(data[8:]) > cls.max_ids:
+                raise ValueError('too many ids')
+            start = struct.unpack('<q', data[:8])[0]
+            res._ids.extend(
+                start + (ix << 3) + bit
+                for ix, byte in enumerate(data[8:]) if byte
+                for bit in range(8) if byte & (1 << bit))
+        elif kind == b'a' and len(data) % res._ids.itemsize == 0:
+            if len(data) // res._ids.itemsize > cls.max_ids:
+                raise ValueError('too many ids')
+            res._ids.frombytes(data)
+            if sys.byteorder == 'big':
+                res._ids.byteswap()
+            if any(a >= b for a, b in zip(res._ids, res._ids[1:])):
+                raise ValueError('invalid id set')
+        else:
+            raise ValueError('invalid id set')
+        return res
+
+
+def _countBits(data):
+    bits = int.from_bytes(data, 'little')
+    try:
+        return bits.bit_count()
+    except AttributeError:  # Python < 3.10
+        return bin(bits).count('1')
+
+
+class Selection:
+    """Selected item ids.
+
+    ids - the ids of the selected items
+    all - whether all the matching items are selected, except those whose
+        ids are in ids
+    """
+
+    def __init__(self, ids=(), all=False):
+        self.ids = IdSet(ids)
+        self.all = all
+
+    def __contains__(self, id):
+        return (id in self.ids) != self.all
+
+    def __bool__(self):
+        return self.all or bool(self.ids)
+
+    def select(self, id):
+        """Select the item with the id.
+
+        Raises ValueError if the ids would exceed IdSet.max_ids.
+        """
+        if self.all:
+            self.ids.discard(id)
+        else:
+            self.ids.add(id)
+
+    def deselect(self, id):
+        """Deselect the item with the id.
+
+        Raises ValueError if the ids would exceed IdSet.max_ids.
+        """
+        if self.all:
+            self.ids.add(id)
+        else:
+            self.ids.discard(id)
+
+    def selectAll(self):
+        self.ids.clear()
+        self.all = True
+
+    def clear(self):
+        self.ids.clear()
+        self.all = False
+
+    def toString(self):
+        return (self.all and '*' or '') + self.ids.toString()
+
+    @classmethod
+    def fromString(cls, string):
+        res = cls()
+        if string.startswith('*'):
+            string = string[1:]
+            res.all = True
+        res.ids = IdSet.fromString(string)
+        return res
+
+    def getItems(self, items, getId, lookup=None):
+        """Return an iterator over the selected items.
+
+        items - the matching items; only iterated over when all the items
+            are selected, or without lookup
+        getId - a callable that is passed an item and returns its id
+        lookup - an optional callable that is passed an id and returns the
+            item
+        """
+        if lookup is not None and not self.all:
+            return (lookup(id) for id in self.ids)
+        return (item for item in items if getId(item) in self)
+
+
+class SelectionColumn(column.Column):
+    """Checkboxes selecting items across batches and sort orders.
+
+    idgetter - a callable that is passed an item and returns its integer id
+    prefix - the prefix of the names of the form fields, after the prefix of
+        the formatter
+
+    The header carries the selection in a hidden field, and has buttons to
+    select all the matching items or none.  The selection is updated with
+    the checkboxes of the items of the previous request.
+    """
+
+    def __init__(self, idgetter, prefix='selection', title='', name=None):
+        super().__init__(title, name or prefix)
+        self.idgetter = idgetter
+        self.prefix = prefix
+
+    def getName(self, formatter):
+        if formatter.prefix:
+            return f'{formatter.prefix}.{self.prefix}'
+        return self.prefix
+
+    def getSelection(self, formatter):
+        """Return the Selection of the request, computed once per formatter.
+        """
+        key = 'zc.table.selection.' + self.getName(formatter)
+        res = formatter.annotations.get(key)
+        if res is None:
+            res = formatter.annotations[key] = self.readSelection(formatter)
+        return res
+
+    def readSelection(self, formatter):
+        form = formatter.request.form
+        name = self.getName(formatter)
+        try:
+            selection = Selection.fromString(form.get(name) or '')
+        except ValueError:
+            selection = Selection()
+        action = form.get(name + '.action')
+        if action == 'all':
+            selection.selectAll()
+        elif action == 'none':
+            selection.clear()
+        else:
+            checked = set(_getList(form, name + '.ids'))
+            for id in _getList(form, name + '.shown'):
+                try:
+                    value = int(id)
+                except ValueError:
+                    continue
+                # items that would make the selection too large to be
+                # carried keep their previous state, and are rendered so
+                try:
+                    if id in checked:
+                        selection.select(value)
+                    else:
+                        selection.deselect(value)
+                except ValueError:
+                    continue
+        return selection
+
+    def getSelectedItems(self, items, formatter, lookup=None):
+        """Return an iterator over the selected items.
+
+        See Selection.getItems.
+        """
+        return self.getSelection(formatter).getItems(
+            items, self.idgetter, lookup)
+
+    def renderHeader(self, formatter):
+        name = self.getName(formatter)
+        request = formatter.request
+        res = ['<input type="hidden" name={} value={} />'.format(
+            quoteattr(name),
+            quoteattr(self.getSelection(formatter).toString()))]
+        for action, label in (('all', 'Select all'), ('none', 'Select none')):
+            res.append(
+                '<button type="submit" name={} value="{}">{}</button>'.format(
+                    quoteattr(name + '.action'), action,
+                    i18n.translate(label, domain='zc.table', context=request,
+                                   default=label)))
+        title = super().renderHeader(formatter)
+        if title:
+            res.insert(0, title)
+        return '\n'.join(res)
+
+    def renderCell(self, item, formatter):
+        name = self.getName(formatter)
+        id = int(self.idgetter(item))
+        checked = ''
+        if id in self.getSelection(formatter):
+            checked = 'checked="checked" '
+        return (
+            '<input type="checkbox" name={} value="{}" {}/>'
+            '<input type="hidden" name={} value="{}" />').format(
+                quoteattr(name + '.ids:list'), id, checked,
+                quoteattr(name + '.shown:list'), id)
+
+
+def _getList(form, name):
+    value = form.get(name, ())
+    if isinstance(value, str):
+        return [value]
+    return value
@@ -0,0 +1,124 @@
+##############################################################################
+#
+# Copyright (c) 2026 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Queryable item sources.
+
+SQLiteItems is a reference implementation of IQueryableItems, over the rows
+of an SQLite table or view: formatters only load the rows they render, sorted
+and sliced by the database.
+"""
+import sqlite3
+
+from zope import interface
+
+from zc.table import interfaces
+
+
+def quoteIdentifier(name):
+    return '"%s"' % name.replace('"', '""')
+
+
+@interface.implementer(interfaces.IQueryableItems,
+                       interfaces.IProjectableItems)
+class SQLiteItems:
+    """The rows of an SQLite table or view.
+
+    connection - an sqlite3 connection
+    table - the name of the table or view
+    where - an optional SQL condition selecting the rows, with ?
+        placeholders for params
+    params - the values of the placeholders of where
+    key - a field with unique values, ordering the rows when they are not
+        sorted, and rows with equal sort fields when they are
+    factory - an optional callable that is passed each row, as a
+        sqlite3.Row, and returns the item; by default, items are the rows
+
+    Only the fields set with setProjection, if any, are selected.  Not
+    intended to be kept between requests: the number of rows is only counted
+    once.
+    """
+
+    projection = None
+
+    def __init__(self, connection, table, where=None, params=(),
+                 key='rowid', factory=None):
+        self.connection = connection
+        self.table = table
+        self.where = where
+        self.params = tuple(params)
+        self.key = key
+        self.factory = factory
+        self._len = None
+
+    def setProjection(self, fields):
+        self.projection = fields
+
+    def execute(self, sql, params=()):
+        cursor = self.connection.cursor()
+        cursor.row_factory = sqlite3.Row
+        return cursor.execute(sql, params)
+
+    def _select(self, what):
+        sql = 'SELECT {} FROM {}'.format(what, quoteIdentifier(self.table))
+        if self.where:
+            sql += ' WHERE ' + self.where
+        return sql
+
+    def _rows(self, sort_on, start, stop):
+        order = ['{} {}'.format(quoteIdentifier(field),
+                                reversed and 'DESC' or 'ASC')
+                 for field, reversed in sort_on]
+        order.append(quoteIdentifier(self.key))
+        if self.projection is None:
+            what = '*'
+        else:
+            what = ', '.join(map(quoteIdentifier, self.projection)) or 'NULL'
+        sql = self._select(what) + ' ORDER BY {} LIMIT ? OFFSET ?'.format(
+            ', '.join(order))
+        limit = -1 if stop is None else max(stop - start, 0)
+        rows = self.execute(sql, self.params + (limit, start))
+        if self.factory is None:
+            return rows
+        return map(self.factory, rows)
+
+    def query(self, sort_on, start, stop):
+        return list(self._rows(sort_on, start, stop))
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, stride = key.start, key.stop, key.step
+            if (start or 0) < 0 or (stop or 0) < 0:
+                start, stop, stride = key.indices(len(self))
+            if stride not in (None, 1):
+                return self.query((), start or 0, stop)[::stride]
+            return self.query((), start or 0, stop)
+        if key < 0:
+            key += len(self)
+            if key < 0:
+                raise IndexError('list index out of range')
+        res = self.query((), key, key + 1)
+        if not res:
+            raise IndexError('list index out of range')
+        return res[0]
+
+    def __iter__(self):
+        return iter(self._rows((), 0, None))
+
+    def __len__(self):
+        if self._len is None:
+            self._len = self.execute(
+                self._select('count(*)'), self.params).fetchone()[0]
+        return self._len
+
+    def __bool__(self):
+        return bool(self.query((), 0, 1))
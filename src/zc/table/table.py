@@ -14,20 +14,60 @@
 """Table formatting and configuration
 
 $Id: table.py 4428 2005-12-13 23:35:48Z gary $
+
+zc.resourcelibrary is only imported when a table is rendered, so that code
+that merely uses formatters for their rows and cells doesn't pay for it.
 """
-from xml.sax.saxutils import quoteattr
+import collections
+import collections.abc
+import contextlib
+import itertools
+import time
 
-import zc.resourcelibrary
 import zope.cachedescriptors.property
-from zope import component
 from zope import interface
 
+from zc.table import aggregate
+from zc.table import collation
 from zc.table import interfaces
 
 
+class BudgetExceeded(Exception):
+    """The time budget of a rendering is spent."""
+
+
+# why and after how many rows a rendering was truncated
+Truncation = collections.namedtuple('Truncation', ('reason', 'rows'))
+
+
+def quoteattr(data):
+    # xml.sax.saxutils imports urllib.request and friends; defer that
+    from xml.sax.saxutils import quoteattr
+    return quoteattr(data)
+
+
 @interface.implementer(interfaces.IFormatter)
 class Formatter:
     items = None
+    visible_columns = None
+    profile = None  # set to a zc.table.profiling.Profile to instrument
+    # set to an IPermutationStore, with the version of the items, to share
+    # sorted orders
+    permutations = None
+    items_version = None
+    # set to an ISortCache of all the items to sort them once
+    sort_cache = None
+    # set to the POSIX time the items were last modified at, for the
+    # Last-Modified header
+    items_modified = None
+    # the seconds and the rows a rendering may take, if limited; requests
+    # may override them with the 'zc.table.time_budget' and
+    # 'zc.table.row_budget' annotations
+    time_budget = None
+    row_budget = None
+    clock = time.monotonic
+    deadline = None
+    truncation = None  # a Truncation, if the rendering was truncated
 
     def __init__(self, context, request, items, visible_column_names=None,
                  batch_start=None, batch_size=None, prefix=None, columns=None):
@@ -48,9 +88,39 @@ class Formatter:
         self.batch_size = batch_size
         self.prefix = prefix
         self.cssClasses = {}
+        self.updateProjection()
 
     def setItems(self, items):
         self.items = items
+        if self.visible_columns is not None:
+            self.updateProjection()
+
+    def getProjectedColumns(self):
+        """Return the columns whose values are read from the items."""
+        res = list(self.visible_columns)
+        if interfaces.IColumnSortedItems.providedBy(self.items):
+            for name, reversed in self.items.sort_on or ():
+                res.append(self.columns_by_name[name])
+        return res
+
+    def getProjection(self):
+        """Return the names of the fields of the items that are read.
+
+        Returns None if a column that reads the items doesn't declare the
+        fields it needs.
+        """
+        res = set()
+        for column in self.getProjectedColumns():
+            fields = getattr(column, 'fields', None)
+            if fields is None:
+                return None
+            res.update(fields)
+        return sorted(res)
+
+    def updateProjection(self):
+        """Tell projectable items which of their fields are read."""
+        if interfaces.IProjectableItems.providedBy(self.items):
+            self.items.setProjection(self.getProjection())
 
     @zope.cachedescriptors.property.Lazy
     def columns_by_name(self):
@@ -65,18 +135,210 @@ class Formatter:
         return klass and ' class=%s' % quoteattr(klass) or ''
 
     def __call__(self):
-        return '\n<table{}>\n{}</table>\n{}'.format(
-            self._getCSSClass('table'), self.renderContents(),
-            self.renderExtra())
+        if self.checkNotModified():
+            return ''
+        self.startBudget()
+        with self._phase('render'):
+            res = '\n<table{}>\n{}</table>\n{}'.format(
+                self._getCSSClass('table'), self.renderContents(),
+                self._renderExtra())
+        if self.profile is not None:
+            self.profile.finish(self)
+        return res
+
+    def getValidatorData(self):
+        """Return what the rendering depends on, or None if unknown.
+
+        Based on the `items_version`, which must be set for the rendering to
+        be validated.  The form of the request is included, since columns
+        may render from it, such as selections and sticky widget values.
+        """
+        if self.items_version is None:
+            return None
+        sort_on = None
+        if interfaces.IColumnSortedItems.providedBy(self.items):
+            sort_on = [(nm, bool(reversed))
+                       for nm, reversed in self.items.sort_on or ()]
+        form = getattr(self.request, 'form', None) or {}
+        return [
+            self.items_version, sort_on, self.batch_start, self.batch_size,
+            [col.name for col in self.visible_columns], self.prefix,
+            collation.getLanguage(self.request),
+            sorted((name, repr(value)) for name, value in form.items())]
+
+    def getETag(self):
+        """Return the weak entity tag of the rendering, or None."""
+        import hashlib
+        data = self.getValidatorData()
+        if data is None:
+            return None
+        return 'W/"%s"' % hashlib.sha1(repr(data).encode('utf-8')).hexdigest()
+
+    def checkNotModified(self):
+        """Set the validators of the rendering on the response.
+
+        Returns whether the validators match the conditional headers of a GET
+        or HEAD request, in which case the response status is set to 304 and
+        there is no need to render.
+        """
+        import email.utils
+        etag = self.getETag()
+        if etag is None:
+            return False
+        response = self.request.response
+        response.setHeader('ETag', etag)
+        if self.items_modified is not None:
+            response.setHeader('Last-Modified', email.utils.formatdate(
+                self.items_modified, usegmt=True))
+        if self.request.method not in ('GET', 'HEAD'):
+            return False
+        if_none_match = self.request.getHeader('If-None-Match')
+        if if_none_match is not None:
+            tags = {tag.strip() for tag in if_none_match.split(',')}
+            opaque = etag[2:]
+            matches = '*' in tags or opaque in tags or etag in tags
+        else:
+            if_modified_since = self.request.getHeader('If-Modified-Since')
+            if if_modified_since is None or self.items_modified is None:
+                return False
+            try:
+                since = email.utils.parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+            matches = int(self.items_modified) <= since.timestamp()
+        if matches:
+            response.setStatus(304)
+        return matches
+
+    def getBudget(self):
+        """Return the time budget and the row budget, either may be None."""
+        annotations = getattr(self.request, 'annotations', None) or {}
+        return (annotations.get('zc.table.time_budget', self.time_budget),
+                annotations.get('zc.table.row_budget', self.row_budget))
+
+    def startBudget(self):
+        """Start spending the time budget of a rendering."""
+        time_budget = self.getBudget()[0]
+        if time_budget is None:
+            self.deadline = None
+        else:
+            self.deadline = self.clock() + time_budget
+        self.truncation = None
+
+    def checkBudget(self):
+        """Raise BudgetExceeded if the time budget is spent.
+
+        Called while sorting, when there is a time budget.
+        """
+        if self.deadline is not None and self.clock() >= self.deadline:
+            raise BudgetExceeded()
+
+    def _budgeted(self, items, row_budget):
+        rows = 0
+        items = iter(items)
+        try:
+            while True:
+                if row_budget is not None and rows >= row_budget:
+                    next(items)  # raises StopIteration if all were rendered
+                    self.truncation = Truncation('rows', rows)
+                    return
+                if self.deadline is not None:
+                    self.checkBudget()
+                yield next(items)
+                rows += 1
+        except StopIteration:
+            return
+        except BudgetExceeded:
+            self.truncation = Truncation('time', rows)
+            self.deadline = None  # let the rest of the table render
+
+    def _phase(self, name):
+        if self.profile is None:
+            return contextlib.nullcontext()
+        return self.profile.phase(name)
+
+    def _renderExtra(self):
+        with self._phase('extra'):
+            return self.renderExtra()
 
     def renderExtra(self):
+        import zc.resourcelibrary
         zc.resourcelibrary.need('zc.table')
         return ''
 
     def renderContents(self):
-        return '  <thead{}>\n{}  </thead>\n  <tbody>\n{}  </tbody>\n'.format(
-            self._getCSSClass('thead'), self.renderHeaderRow(),
-            self.renderRows())
+        return (
+            '  <thead{}>\n{}  </thead>\n  <tbody>\n{}  </tbody>\n{}'.format(
+                self._getCSSClass('thead'), self.renderHeaderRow(),
+                self.renderRows(), self.renderFooter()))
+
+    def renderFooter(self):
+        rows = self.renderFooterRows()
+        if not rows:
+            return ''
+        return '  <tfoot{}>\n{}  </tfoot>\n'.format(
+            self._getCSSClass('tfoot'), rows)
+
+    def renderFooterRows(self):
+        # one row for each kind of aggregate, in order of first declaration
+        declared = {}
+        kinds = {}
+        for column in self.visible_columns:
+            factories = declared[column.name] = {}
+            for factory in getattr(column, 'aggregates', ()):
+                factories[factory.name] = factory
+                kinds.setdefault(factory.name)
+        if not kinds:
+            return ''
+        aggregates = self.getAggregates()
+        if aggregates is None:
+            return ''
+        rows = []
+        for name in kinds:
+            cells = []
+            for column in self.visible_columns:
+                factory = declared[column.name].get(name)
+                if factory is None:
+                    cell = ''
+                else:
+                    cell = column.renderAggregate(
+                        factory, aggregates[column.name][name], self)
+                cells.append(
+                    '      <td{}>\n        {}\n      </td>\n'.format(
+                        self._getCSSClass('td'), cell))
+            rows.append('    <tr{}>\n{}    </tr>\n'.format(
+                self._getCSSClass('tr'), ''.join(cells)))
+        return ''.join(rows)
+
+    def getAggregates(self):
+        if 'zc.table.aggregates' in self.annotations:
+            return self.annotations['zc.table.aggregates']
+        res = None
+        # the aggregates of a truncated rendering would take the pass over
+        # all the items that the budget ruled out
+        if self.truncation is None:
+            self._keepItems()
+            items = self.items
+            if interfaces.IColumnSortedItems.providedBy(items):
+                # aggregates don't depend on the order; don't sort
+                items = items.items
+            with self._phase('aggregates'):
+                res = aggregate.computeAggregates(
+                    self.visible_columns,
+                    self._budgeted(items, self.getBudget()[1]), self)
+            if self.truncation is not None:
+                res = None
+        self.annotations['zc.table.aggregates'] = res
+        return res
+
+    def _keepItems(self):
+        # aggregates take a pass over the items of their own; keep items
+        # that can only be iterated over once
+        items = self.items
+        if isinstance(items, collections.abc.Iterator) and any(
+                getattr(column, 'aggregates', ())
+                for column in self.visible_columns):
+            self.items = list(items)
 
     def renderHeaderRow(self):
         return '    <tr{}>\n{}    </tr>\n'.format(
@@ -94,15 +356,35 @@ class Formatter:
         return [self.getHeader(column) for column in self.visible_columns]
 
     def getHeader(self, column):
+        if self.profile is not None:
+            return self.profile.call(
+                column.name, 'renderHeader', column.renderHeader, self)
         return column.renderHeader(self)
 
     def renderRows(self):
-        return ''.join([self.renderRow(item) for item in self.getItems()])
+        if self.profile is None:
+            res = ''.join([self.renderRow(item) for item in self.getItems()])
+        else:
+            with self.profile.phase('items'):
+                items = list(self.getItems())
+            with self.profile.phase('rows'):
+                res = ''.join([self.renderRow(item) for item in items])
+        if self.truncation is not None:
+            res += self.renderTruncation()
+        return res
+
+    def renderTruncation(self):
+        from zope.i18n import translate
+        message = translate(
+            'Results truncated', domain='zc.table', context=self.request,
+            default='Results truncated')
+        return ('  <tr class="zc-table-truncated">\n'
+                '    <td colspan="{}">\n      {}\n    </td>\n'
+                '  </tr>\n').format(len(self.visible_columns), message)
 
     def getRows(self):
         for item in self.getItems():
-            yield [column.renderCell(item, self)
-                   for column in self.visible_columns]
+            yield self.getCells(item)
 
     def renderRow(self, item):
         return '  <tr{}>\n{}  </tr>\n'.format(
@@ -120,9 +402,24 @@ class Formatter:
         return [self.getCell(item, column) for column in self.visible_columns]
 
     def getCell(self, item, column):
+        if self.profile is not None:
+            return self.profile.call(
+                column.name, 'renderCell', column.renderCell, item, self)
         return column.renderCell(item, self)
 
     def getItems(self):
+        self._keepItems()
+        items = self._getItems()
+        time_budget, row_budget = self.getBudget()
+        if time_budget is not None or row_budget is not None:
+            if self.deadline is None:
+                self.startBudget()
+            items = self._budgeted(items, row_budget)
+        if self.profile is not None:
+            return self.profile.countItems(items)
+        return items
+
+    def _getItems(self):
         batch_start = self.batch_start or 0
         batch_size = self.batch_size or 0
         if not self.batch_size:
@@ -146,7 +443,8 @@ class Formatter:
 
 # sorting helpers
 
-@interface.implementer(interfaces.IColumnSortedItems)
+@interface.implementer(interfaces.IColumnSortedItems,
+                       interfaces.IProjectableItems)
 class ColumnSortedItems:
     # not intended to be persistent!
     """a wrapper for items that sorts lazily based on ISortableColumns.
@@ -193,22 +491,130 @@ class ColumnSortedItems:
     def setFormatter(self, formatter):
         self.formatter = formatter
 
+    def setProjection(self, fields):
+        if interfaces.IProjectableItems.providedBy(self._items):
+            self._items.setProjection(fields)
+
     @property
     def sorters(self):
         res = []
+        profile = getattr(self.formatter, 'profile', None)
         for nm, reversed in self.sort_on:
             column = self.formatter.columns_by_name[nm]
             if reversed:
-                res.append(column.reversesort)
+                sorter = column.reversesort
             else:
-                res.append(column.sort)
+                sorter = column.sort
+            if profile is not None:
+                sorter = profile.wrap(nm, 'sort', sorter)
+            res.append(sorter)
+        return res
+
+    def _query_sort_on(self):
+        # the fields to have queryable items sort themselves on, or None
+        if not interfaces.IQueryableItems.providedBy(self._items):
+            return None
+        res = []
+        for nm, reversed in self.sort_on:
+            column = self.formatter.columns_by_name[nm]
+            field = getattr(column, 'sort_field', None)
+            if field is None:
+                return None
+            res.append((field, reversed))
+            if not getattr(column, 'subsort', False):
+                break  # the column ignores the other sorters
+        return res
+
+    def _sort(self, items, start, stop):
+        cache = getattr(self.formatter, 'sort_cache', None)
+        if cache is not None and self._isFullItems() and self._isStorable():
+            language = collation.getLanguage(self.formatter.request)
+            version = getattr(self.formatter, 'items_version', None)
+            res = cache.get(self.sort_on, language, version)
+            if res is None:
+                res = cache.set(self.sort_on, items, language, version)
+            return res
+        store = getattr(self.formatter, 'permutations', None)
+        version = getattr(self.formatter, 'items_version', None)
+        if (store is not None and version is not None and
+                getattr(self._items, '__getitem__', None) is not None and
+                self._isFullItems() and self._isStorable()):
+            permutation = store.get(version, self.sort_on)
+            if permutation is None:
+                permutation = self._permute(items)
+                permutation = (
+                    store.set(version, self.sort_on, permutation) or
+                    permutation)
+            return PermutedItems(items, permutation)
+        return self._sortItems(items, start, stop)
+
+    def _isFullItems(self):
+        # orders are cached and stored for all the items of the table, not
+        # for items filtered for a request
+        return not isinstance(self._items, FilteredItems)
+
+    def _isStorable(self):
+        # sort_on may come from the request: only store orders of columns of
+        # the formatter that sort by their sort keys, as _permute does
+        from zc.table.column import SortingColumn
+        columns = self.formatter.columns_by_name
+        for nm, reversed in self.sort_on:
+            column = columns.get(nm)
+            if not isinstance(column, SortingColumn):
+                return False
+            klass = column.__class__
+            if (klass.sort is not SortingColumn.sort or
+                    klass.reversesort is not SortingColumn.reversesort or
+                    klass._sort is not SortingColumn._sort):
+                return False
+        return True
+
+    def _sortItems(self, items, start, stop):
+        sorters = self.sorters
+        profile = getattr(self.formatter, 'profile', None)
+        if profile is None:
+            return sorters[0](items, self.formatter, start, stop, sorters[1:])
+        with profile.phase('sort'):
+            begin = profile.clock()
+            res = sorters[0](items, self.formatter, start, stop, sorters[1:])
+            profile.recordSort(profile.clock() - begin, len(res))
+        return res
+
+    def _permute(self, items):
+        # the indexes of the items in sorted order.  Items may be new objects
+        # each time they are read, so they are read once, in a single pass,
+        # for their sort keys, and the indexes are sorted by those keys.
+        formatter = self.formatter
+        profile = getattr(formatter, 'profile', None)
+        checkBudget = None
+        if getattr(formatter, 'deadline', None) is not None:
+            checkBudget = formatter.checkBudget
+        getters = []
+        for nm, reversed in self.sort_on:
+            column = formatter.columns_by_name[nm]
+            getSortKey = column.getSortKey
+            if profile is not None:
+                getSortKey = profile.wrap(nm, 'getSortKey', getSortKey)
+            getters.append((getSortKey, reversed))
+            if not getattr(column, 'subsort', False):
+                break  # the column ignores the other sort columns
+        keys = []
+        for item in items:
+            if checkBudget is not None:
+                checkBudget()
+            keys.append([getSortKey(item, formatter)
+                         for getSortKey, reversed in getters])
+        res = list(range(len(keys)))
+        # sorts are stable, so sort by the last key first
+        for pos in range(len(getters) - 1, -1, -1):
+            res.sort(key=lambda ix: keys[ix][pos], reverse=getters[pos][1])
         return res
 
     def __getitem__(self, key):
         if isinstance(key, slice):
-            start = slice.start
-            stop = slice.stop
-            stride = slice.step
+            start = key.start
+            stop = key.stop
+            stride = key.step
         else:
             start = stop = key
             stride = 1
@@ -218,14 +624,16 @@ class ColumnSortedItems:
             try:
                 return items.__getitem__(key)
             except (AttributeError, TypeError):
-                if stride != 1:
+                if stride not in (None, 1):
                     raise NotImplementedError()
+                if not isinstance(key, slice):
+                    stop = key + 1
                 res = []
                 for ix, val in enumerate(items):
-                    if ix >= start:
-                        res.append(val)
-                    if ix >= stop:
+                    if stop is not None and ix >= stop:
                         break
+                    if ix >= (start or 0):
+                        res.append(val)
 
                 if isinstance(key, slice):
                     return res
@@ -234,8 +642,17 @@ class ColumnSortedItems:
                 else:
                     raise IndexError('list index out of range')
 
-        items = self.sorters[0](
-            items, self.formatter, start, stop, self.sorters[1:])
+        query_sort_on = self._query_sort_on()
+        if (query_sort_on is not None and stride in (None, 1) and
+                (start or 0) >= 0 and (stop is None or stop >= 0)):
+            if isinstance(key, slice):
+                return self._items.query(query_sort_on, start or 0, stop)
+            res = self._items.query(query_sort_on, key, key + 1)
+            if not res:
+                raise IndexError('list index out of range')
+            return res[0]
+
+        items = self._sort(items, start, stop)
 
         if isinstance(key, slice):
             return items[start:stop:stride]
@@ -243,6 +660,8 @@ class ColumnSortedItems:
             return items[key]
 
     def __bool__(self):
+        if interfaces.IQueryableItems.providedBy(self._items):
+            return bool(self._items[0:1])
         try:
             next(iter(self.items))
         except StopIteration:
@@ -254,15 +673,40 @@ class ColumnSortedItems:
     def __iter__(self):
         if not self.sort_on:
             return iter(self.items)
-        else:
-            sorters = self.sorters
-            return iter(sorters[0](
-                self.items, self.formatter, 0, None, sorters[1:]))
+        query_sort_on = self._query_sort_on()
+        if query_sort_on is not None:
+            return iter(self._items.query(query_sort_on, 0, None))
+        return iter(self._sort(self.items, 0, None))
 
     def __len__(self):
         return len(self.items)
 
 
+class PermutedItems:
+    """Items in the order of a permutation of their indexes.
+
+    Only the items sliced or iterated over are looked up.
+    """
+
+    def __init__(self, items, permutation):
+        self._items = items
+        self.permutation = permutation
+
+    def __getitem__(self, key):
+        items = self._items
+        if isinstance(key, slice):
+            return [items[ix] for ix in self.permutation[key]]
+        return items[self.permutation[key]]
+
+    def __iter__(self):
+        items = self._items
+        for ix in self.permutation:
+            yield items[ix]
+
+    def __len__(self):
+        return len(self.permutation)
+
+
 def getRequestSortOn(request, sort_on_name):
     """get the sorting values from the request.
 
@@ -318,6 +762,174 @@ def getSortOnName(prefix=None):
     return sort_on_name
 
 
+# filtering helpers
+
+@interface.implementer(interfaces.IProjectableItems)
+class FilteredItems:
+    # not intended to be persistent!
+    """a wrapper for items that filters lazily based on IFilterableColumns.
+
+    Given items and a list of (column name, value) pairs, supports iteration
+    over the items that all the named columns match.  Items are found with
+    the indexes of the columns that have them, by intersecting the smallest
+    index result with the others, and then with a scan of those items, or of
+    all the items if no column has an index, by the other columns.  The
+    order of the items is the order of the smallest index result, if any.
+    Filters naming columns that are unknown or not filterable are ignored.
+    """
+
+    formatter = None
+
+    def __init__(self, items, filters):
+        self._items = items
+        self.filters = filters  # sequence of (column name, value) pairs
+        self._cache = []
+        self._iterable = None
+
+    def setFormatter(self, formatter):
+        self.formatter = formatter
+
+    def setProjection(self, fields):
+        if interfaces.IProjectableItems.providedBy(self._items):
+            self._items.setProjection(fields)
+
+    def __iter__(self):
+        # like ColumnSortedItems._iter, items are only filtered once, and
+        # multiple simultaneous iterations are supported
+        ix = 0
+        cache = self._cache
+        while True:
+            try:
+                yield cache[ix]
+            except IndexError:
+                if self._iterable is None:
+                    self._iterable = self._filter()
+                try:
+                    nxt = next(self._iterable)
+                except StopIteration:
+                    return
+                cache.append(nxt)
+                yield nxt
+            ix += 1
+
+    def _filter(self):
+        formatter = self.formatter
+        indexed = []
+        scanned = []
+        for name, value in self.filters:
+            column = formatter.columns_by_name.get(name)
+            if not interfaces.IFilterableColumn.providedBy(column):
+                continue
+            found = column.getIndexed(value, formatter)
+            if found is None:
+                scanned.append((column, value))
+            else:
+                indexed.append(found)
+        if indexed:
+            indexed.sort(key=len)
+            smallest, others = indexed[0], indexed[1:]
+            if others:
+                items = (item for item in smallest
+                         if all(item in found for found in others))
+            else:
+                items = smallest
+        else:
+            items = self._items
+        for column, value in scanned:
+            items = column.filter(items, value, formatter)
+        return iter(items)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            if key.step not in (None, 1):
+                raise NotImplementedError()
+            return list(itertools.islice(self, key.start, key.stop))
+        for item in itertools.islice(self, key, None):
+            return item
+        raise IndexError('list index out of range')
+
+    def __len__(self):
+        # all the items have to be filtered to be counted
+        if self._iterable is None:
+            self._iterable = self._filter()
+        self._cache.extend(self._iterable)
+        return len(self._cache)
+
+    def __bool__(self):
+        for item in self:
+            return True
+        return False
+
+    __nonzero__ = __bool__
+
+
+def getRequestFilters(request, filter_name):
+    """get the filtering values from the request.
+
+    Values are given by form fields named with the filter name, a dot and a
+    column name; empty values are ignored.  Returns a list of (name, value)
+    pairs.
+    """
+    prefix = filter_name + '.'
+    return [[key[len(prefix):], value]
+            for key, value in request.form.items()
+            if key.startswith(prefix) and value]
+
+
+def getFilterName(prefix=None):
+    """convert the table prefix to the 'filter' name used in forms"""
+    filter_name = 'filter'
+    if prefix is not None:
+        if not prefix.endswith('.'):
+            prefix += '.'
+        filter_name = prefix + filter_name
+    return filter_name
+
+
+class FilteringFormatterMixin:
+    """filters the items with the filters given and those in the request.
+
+    Must precede any sorting mixin in the bases of a formatter class, so
+    that the items are filtered before they are sorted.  Filters are
+    (column name, value) pairs; values in the request replace the values
+    given for the same columns.
+    """
+
+    filters = None
+
+    def __init__(self, context, request, items, *args, filters=None, **kw):
+        super().__init__(context, request, items, *args, **kw)
+        filters = [list(f) for f in filters or ()]
+        if not kw.get('ignore_request', False):
+            requested = getRequestFilters(
+                request, getFilterName(self.prefix))
+            names = {name for name, value in requested}
+            filters = [f for f in filters if f[0] not in names] + requested
+        if filters:
+            self.filters = filters
+            self.setItems(items)
+
+    def getValidatorData(self):
+        res = super().getValidatorData()
+        if res is not None:
+            res.append(sorted(map(tuple, self.filters or ())))
+        return res
+
+    def getProjectedColumns(self):
+        res = super().getProjectedColumns()
+        for name, value in self.filters or ():
+            column = self.columns_by_name.get(name)
+            if interfaces.IFilterableColumn.providedBy(column):
+                res.append(column)
+        return res
+
+    def setItems(self, items):
+        if self.filters and not isinstance(items, FilteredItems):
+            items = FilteredItems(items, self.filters)
+            items.setFormatter(self)
+        super().setItems(items)
+
+
 class SortingFormatterMixin:
     """automatically munges sort_on values with sort settings in the request.
     """
@@ -345,7 +957,7 @@ class SortingFormatterMixin:
             items = ColumnSortedItems(items, self.items.sort_on)
         if interfaces.IColumnSortedItems.providedBy(items):
             items.setFormatter(self)
-        self.items = items
+        super().setItems(items)
 
 
 class AbstractSortFormatterMixin:
@@ -354,12 +966,13 @@ class AbstractSortFormatterMixin:
     script_name = None  # Must be defined in subclass
 
     def getHeader(self, column):
-        contents = column.renderHeader(self)
+        contents = super().getHeader(column)
         if (interfaces.ISortableColumn.providedBy(column)):
             contents = self._addSortUi(contents, column)
         return contents
 
     def _addSortUi(self, header, column):
+        from zope import component
         columnName = column.name
         resource_path = component.getAdapter(self.request, name='zc.table')()
         if (interfaces.IColumnSortedItems.providedBy(self.items) and
@@ -457,8 +1070,174 @@ class FormSortFormatterMixin(AbstractSortFormatterMixin):
             items = ColumnSortedItems(items, self.items.sort_on)
         if interfaces.IColumnSortedItems.providedBy(items):
             items.setFormatter(self)
+        super().setItems(items)
+
+
+# grouping helpers
+
+class Group:
+    """A group of consecutive items having the same value in a column."""
+
+    def __init__(self, formatter, key, items):
+        self.formatter = formatter
+        self.key = key
         self.items = items
 
+    @property
+    def token(self):
+        return str(self.key)
+
+    @property
+    def count(self):
+        return len(self.items)
+
+    @zope.cachedescriptors.property.Lazy
+    def aggregates(self):
+        return aggregate.computeAggregates(
+            self.formatter.visible_columns, self.items, self.formatter)
+
+
+def getExpandedName(prefix=None):
+    """convert the table prefix to the name of the expanded groups in forms
+    """
+    expanded_name = 'expanded'
+    if prefix is not None:
+        if not prefix.endswith('.'):
+            prefix += '.'
+        expanded_name = prefix + expanded_name
+    return expanded_name
+
+
+class GroupingFormatterMixin:
+    """groups the rows by the values of the group_by column.
+
+    Each group is rendered as a row with the group value, the number of
+    items in the group, and the aggregates of the other columns, followed,
+    if the group is expanded, by the rows of its items.  Groups are expanded
+    if their tokens are in `expanded`, or in the request, unless
+    `expand_all` is true.  renderGroup renders the rows of a single group,
+    for requests that expand it.
+
+    Items must be sorted by the group_by column: if they are sorted by
+    columns, the group_by column is made the primary sort column.
+    batch_start and batch_size count groups rather than items, and items are
+    only read up to the last group rendered.  Must precede other mixins
+    rendering rows in the bases of a formatter class.
+    """
+
+    group_by = None
+    expanded = ()
+    expand_all = False
+
+    def __init__(self, context, request, items, *args,
+                 group_by=None, expanded=None, **kw):
+        super().__init__(context, request, items, *args, **kw)
+        if group_by is not None:
+            self.group_by = group_by
+        if expanded is None and not kw.get('ignore_request', False):
+            expanded = request.form.get(getExpandedName(self.prefix))
+            if isinstance(expanded, str):
+                expanded = [expanded]
+        if expanded is not None:
+            self.expanded = set(expanded)
+        items = self.items
+        if (interfaces.IColumnSortedItems.providedBy(items) and
+                items.sort_on and items.sort_on[0][0] != self.group_by):
+            items.sort_on = [[self.group_by, False]] + [
+                [nm, reverse] for nm, reverse in items.sort_on
+                if nm != self.group_by]
+        self.updateProjection()
+
+    def getValidatorData(self):
+        res = super().getValidatorData()
+        if res is not None:
+            res.extend((self.group_by, self.expand_all, sorted(self.expanded)))
+        return res
+
+    def getProjectedColumns(self):
+        res = super().getProjectedColumns()
+        if self.group_by is not None:
+            res.append(self.columns_by_name[self.group_by])
+        return res
+
+    def isExpanded(self, group):
+        return self.expand_all or group.token in self.expanded
+
+    def _getGroups(self):
+        column = self.columns_by_name[self.group_by]
+        grouped = itertools.groupby(
+            self.items, lambda item: column.getter(item, self))
+        for key, items in grouped:
+            yield Group(self, key, list(items))
+
+    def getGroups(self):
+        """Return the groups in the current batch."""
+        batch_start = self.batch_start or 0
+        batch_size = self.batch_size or 0
+        batch_end = batch_start + batch_size if batch_size else None
+        return itertools.islice(self._getGroups(), batch_start, batch_end)
+
+    _group_token = None  # set while rendering a single group
+
+    def _getItems(self):
+        if self._group_token is not None:
+            for group in self._getGroups():
+                if group.token == self._group_token:
+                    yield from group.items
+                    return
+            raise KeyError(self._group_token)
+        for group in self.getGroups():
+            yield group
+            if self.isExpanded(group):
+                yield from group.items
+
+    def getRows(self):
+        for item in self.getItems():
+            if isinstance(item, Group):
+                yield self.getGroupCells(item)
+            else:
+                yield self.getCells(item)
+
+    def getGroupCells(self, group):
+        res = []
+        for ix, column in enumerate(self.visible_columns):
+            cell = [column.renderAggregate(
+                factory, group.aggregates[column.name][factory.name], self)
+                for factory in getattr(column, 'aggregates', ())]
+            if not ix:
+                group_column = self.columns_by_name[self.group_by]
+                cell.insert(0, '{} ({})'.format(
+                    group_column.renderCell(group.items[0], self),
+                    group.count))
+            res.append(' '.join(cell))
+        return res
+
+    def renderRow(self, item):
+        if isinstance(item, Group):
+            return self.renderGroupRow(item)
+        return super().renderRow(item)
+
+    def renderGroupRow(self, group):
+        klass = 'zc-table-group zc-table-group-%s' % (
+            self.isExpanded(group) and 'expanded' or 'collapsed')
+        cells = ''.join([
+            '    <td{}>\n      {}\n    </td>\n'.format(
+                self._getCSSClass('td'), cell)
+            for cell in self.getGroupCells(group)])
+        return '  <tr class={} data-group={}>\n{}  </tr>\n'.format(
+            quoteattr(klass), quoteattr(group.token), cells)
+
+    def renderGroup(self, token):
+        """Render the rows of the items of the group with the token.
+
+        Raises KeyError if there is no such group.
+        """
+        self._group_token = token
+        try:
+            return self.renderRows()
+        finally:
+            self._group_token = None
+
 
 class AlternatingRowFormatterMixin:
     row_classes = ('even', 'odd')
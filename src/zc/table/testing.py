@@ -22,8 +22,9 @@ import zc.table.interfaces
 import zc.table.table
 
 
+@interface.provider(zc.table.interfaces.IFormatterFactory)
 class SimpleFormatter(zc.table.table.Formatter):
-    interface.classProvides(zc.table.interfaces.IFormatterFactory)
+    pass
 
 
 def setUp(test):
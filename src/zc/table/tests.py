@@ -21,6 +21,8 @@ from zope import component
 from zope.component.testing import setUp
 from zope.component.testing import tearDown
 
+import zc.table.benchmark
+
 
 def columnSetUp(test):
     setUp(test)
@@ -57,13 +59,18 @@ def fieldColumnSetUp(test):
          zope.publisher.interfaces.browser.IBrowserRequest),
         zope.formlib.interfaces.IInputWidget)
     component.provideAdapter(
-        zope.formlib.widgets.ChoiceDisplayWidget,
+        zope.formlib.widgets.ItemDisplayWidget,
         (zope.schema.interfaces.IChoice,
          zope.schema.interfaces.IVocabularyTokenized,
          zope.publisher.interfaces.browser.IBrowserRequest),
         zope.formlib.interfaces.IDisplayWidget)
 
 
+def batchingSetUp(test):
+    setUp(test)
+    zc.table.benchmark.setUpComponents()
+
+
 DOCTEST_FLAGS = (doctest.NORMALIZE_WHITESPACE |
                  doctest.ELLIPSIS |
                  doctest.IGNORE_EXCEPTION_DETAIL)
@@ -80,6 +87,65 @@ def test_suite():
             setUp=columnSetUp, tearDown=tearDown,
             optionflags=DOCTEST_FLAGS,
         ),
+        doctest.DocFileSuite(
+            'aggregate.rst',
+            optionflags=DOCTEST_FLAGS,
+        ),
+        doctest.DocFileSuite(
+            'batching.rst',
+            setUp=batchingSetUp, tearDown=tearDown,
+            optionflags=DOCTEST_FLAGS,
+        ),
+        doctest.DocFileSuite(
+            'benchmark.rst',
+            setUp=setUp, tearDown=tearDown,
+            optionflags=DOCTEST_FLAGS,
+        ),
+        doctest.DocFileSuite(
+            'budget.rst',
+            optionflags=DOCTEST_FLAGS,
+        ),
+        doctest.DocFileSuite(
+            'collation.rst',
+            optionflags=DOCTEST_FLAGS,
+        ),
+        doctest.DocFileSuite(
+            'conditional.rst',
+            optionflags=DOCTEST_FLAGS,
+        ),
+        doctest.DocFileSuite(
+            'filtering.rst',
+            optionflags=DOCTEST_FLAGS,
+        ),
+        doctest.DocFileSuite(
+            'grouping.rst',
+            optionflags=DOCTEST_FLAGS,
+        ),
+        doctest.DocFileSuite(
+            'invalidation.rst',
+            setUp=setUp, tearDown=tearDown,
+            optionflags=DOCTEST_FLAGS,
+        ),
+        doctest.DocFileSuite(
+            'permutation.rst',
+            optionflags=DOCTEST_FLAGS,
+        ),
+        doctest.DocFileSuite(
+            'profiling.rst',
+            optionflags=DOCTEST_FLAGS,
+        ),
+        doctest.DocFileSuite(
+            'search.rst',
+            optionflags=DOCTEST_FLAGS,
+        ),
+        doctest.DocFileSuite(
+            'selection.rst',
+            optionflags=DOCTEST_FLAGS,
+        ),
+        doctest.DocFileSuite(
+            'source.rst',
+            optionflags=DOCTEST_FLAGS,
+        ),
         doctest.DocFileSuite(
             'fieldcolumn.rst',
             setUp=fieldColumnSetUp, tearDown=tearDown,